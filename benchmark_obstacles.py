@@ -0,0 +1,38 @@
+import numpy as np
+import time
+from move_n_shoot import Game, Level
+from move_n_shoot import create_not_so_simple_ai_action_generator
+
+# Constants
+n_ticks = 3000
+obstacle_counts = [0, 10, 100, 300, 1000]
+screen_sz = (1600, 800)
+
+
+def random_obstacles(n, seed):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(40, 120, size=(n, 2))
+    corners = rng.integers(0, screen_sz, size=(n, 2)) - sizes // 2
+    return np.hstack((corners, sizes)).tolist()
+
+
+def ticks_per_second(level):
+    myGame = Game(screen_sz, video_mode=False, seed=0, level=level)
+    myGame.add_player([100, 100])
+    myGame.add_player([myGame.screen_width, myGame.screen_height])
+    myGame.reset_game()
+    policies = [create_not_so_simple_ai_action_generator(seed=1), create_not_so_simple_ai_action_generator(seed=2)]
+
+    start = time.perf_counter()
+    for _ in range(n_ticks):
+        myGame.update_physics([policies[0](0, myGame), policies[1](1, myGame)])
+    return n_ticks / (time.perf_counter() - start)
+
+
+# Compare the grid index against checking every obstacle (a single cell covering the whole arena)
+print('%10s %15s %15s' % ('obstacles', 'grid ticks/s', 'all ticks/s'))
+for n in obstacle_counts:
+    obstacles = random_obstacles(n, n)
+    grid = ticks_per_second(Level(obstacles, cell_size=100))
+    brute_force = ticks_per_second(Level(obstacles, cell_size=max(screen_sz) * 2))
+    print('%10d %15.0f %15.0f' % (n, grid, brute_force))
@@ -0,0 +1,128 @@
+import numpy as np
+import time
+from move_n_shoot import Game, Level, load_level
+from move_n_shoot import create_not_so_simple_ai_action_generator, create_simple_ai_action_generator
+from move_n_shoot import create_random_player_action_generator
+
+# Constants
+max_score = 50
+n_games = 3
+n_parity_ticks = 5000
+screen_sz = (1600, 800)
+
+
+def random_obstacles(n, seed):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(40, 120, size=(n, 2))
+    corners = rng.integers(0, screen_sz, size=(n, 2)) - sizes // 2
+    return np.hstack((corners, sizes)).tolist()
+
+
+def new_game(seed, level=None, policy_factories=None):
+    if policy_factories is None:
+        policy_factories = [create_not_so_simple_ai_action_generator, create_simple_ai_action_generator]
+
+    myGame = Game(screen_sz, video_mode=False, seed=seed, level=level)
+    myGame.add_player([100, 100])
+    myGame.add_player([myGame.screen_width, myGame.screen_height])
+    myGame.reset_game()
+    policies = [factory(seed=seed + 1 + i) for i, factory in enumerate(policy_factories)]
+    return myGame, policies
+
+
+def stop_condition(game_instance):
+    return (game_instance.players[0].score >= max_score) or (game_instance.players[1].score >= max_score)
+
+
+def hand_written_loop(myGame, policies, n_ticks=None):
+    get_ai_action_1, get_ai_action_2 = policies
+    ticks = 0
+    while (myGame.players[0].score < max_score) and (myGame.players[1].score < max_score):
+        if n_ticks is not None and ticks == n_ticks:
+            break
+
+        myGame.handle_events()
+
+        a1 = get_ai_action_1(0, myGame)
+        a2 = get_ai_action_2(1, myGame)
+
+        myGame.update_physics([a1, a2])
+        myGame.draw_frame()
+        ticks += 1
+    return ticks
+
+
+def as_function(policy):
+    # Hides that the policy is a Policy object, so run_until() takes its path for plain action generators
+    return lambda player_index, game_instance: policy(player_index, game_instance)
+
+
+def check_parity(name, level, policy_factories, wrap=False, shared=False):
+    """
+    Runs the same match with the hand written loop and with run_until(), and fails if they don't end in exactly the
+    same state. With `shared`, the first policy is used for both players.
+    """
+    for seed in range(n_games):
+        loop_game, policies = new_game(seed, level, policy_factories)
+        if shared:
+            policies = [policies[0]] * 2
+        ticks = hand_written_loop(loop_game, policies, n_parity_ticks)
+
+        myGame, policies = new_game(seed, level, policy_factories)
+        if shared:
+            policies = [policies[0]] * 2
+        if wrap:
+            policies = [as_function(policy) for policy in policies]
+        stats = myGame.run_until(policies, stop_condition, n_parity_ticks)
+
+        assert stats['ticks'] == ticks, '%s, seed %d: %d ticks instead of %d' % (name, seed, stats['ticks'], ticks)
+        assert myGame.save_state() == loop_game.save_state(), \
+            '%s, seed %d: run_until() and the hand written loop ended in different states' % (name, seed)
+        assert stats['scores'] == [p.score for p in loop_game.players]
+
+    print('  %s: same final state in all %d games' % (name, n_games))
+
+
+# run_until() plans the policies' actions ahead and skips events and drawing, so check that it still gives exactly the
+# same matches as calling the policies and update_physics()
+print('Parity of run_until() with the hand written loop:')
+levels = [('empty arena', None),
+          ('levels/arena.txt', load_level('levels/arena.txt')),
+          ('100 random obstacles', Level(random_obstacles(100, seed=0)))]
+for level_name, level in levels:
+    check_parity(level_name + ', AI vs AI', level, None)
+    check_parity(level_name + ', random vs AI as functions', level,
+                 [create_random_player_action_generator, create_not_so_simple_ai_action_generator], wrap=True)
+    check_parity(level_name + ', one AI for both players', level, None, shared=True)
+
+# A match that already ended doesn't go on
+myGame, policies = new_game(0)
+myGame.run_until(policies, stop_condition)
+state = myGame.save_state()
+assert myGame.run_until(policies, stop_condition)['ticks'] == 0 and myGame.save_state() == state
+assert myGame.run_until(policies, max_ticks=0)['ticks'] == 0 and myGame.save_state() == state
+
+# Throughput of full matches
+speedups = []
+for level_name, level in levels[:2]:
+    print('Level:', level_name)
+    for seed in range(n_games):
+
+        myGame, policies = new_game(seed, level)
+        start = time.perf_counter()
+        ticks = hand_written_loop(myGame, policies)
+        loop_rate = ticks / (time.perf_counter() - start)
+        loop_state = myGame.save_state()
+
+        myGame, policies = new_game(seed, level)
+        start = time.perf_counter()
+        stats = myGame.run_until(policies, stop_condition)
+        run_until_rate = stats['ticks'] / (time.perf_counter() - start)
+        assert myGame.save_state() == loop_state
+
+        speedups.append(run_until_rate / loop_rate)
+        print('  game %d: %d ticks, loop %.0f ticks/s, run_until %.0f ticks/s (%.1fx)' %
+              (seed, ticks, loop_rate, run_until_rate, speedups[-1]))
+        print('    ', stats)
+
+print('Speedup: %.1fx to %.1fx' % (min(speedups), max(speedups)))
@@ -0,0 +1,47 @@
+import time
+from move_n_shoot import Game
+from move_n_shoot import get_human_player_action
+from move_n_shoot import create_not_so_simple_ai_action_generator
+from pipeline import PipelinedRunner, run_serial
+
+# Constants
+teal_color = [0, 188, 212]
+yellowish_color = [255, 235, 59]
+max_score = 3
+n_frames = 600
+ai_think_time = 0.025  # Simulates an AI that takes a while to decide its actions
+draw_time = 0.012  # Simulates drawing a detailed frame
+
+
+def slow_ai(policy, think_time):
+    def get_slow_ai_action(player_index, game_instance):
+        time.sleep(think_time)
+        return policy(player_index, game_instance)
+    return get_slow_ai_action
+
+
+class SlowDrawingGame(Game):
+    def draw_snapshot(self, snapshot):
+        time.sleep(draw_time)
+        Game.draw_snapshot(self, snapshot)
+
+
+def stop_condition(game_instance):
+    return (game_instance.players[0].score >= max_score) or (game_instance.players[1].score >= max_score)
+
+
+# Initializations
+myGame = SlowDrawingGame(video_mode=True)
+myGame.add_player([100, 100], teal_color)
+myGame.add_player([myGame.screen_width, myGame.screen_height], yellowish_color)
+
+policies = [lambda i, game_instance: get_human_player_action(game_instance),
+            slow_ai(create_not_so_simple_ai_action_generator(), ai_think_time)]
+
+# Run the same game serially and pipelined, and compare frame times and input latency
+print('Serial:')
+print(run_serial(myGame, policies, stop_condition, n_frames))
+myGame.reset_game()
+
+print('Pipelined:')
+print(PipelinedRunner(myGame, policies).run(stop_condition, n_frames))
@@ -1,3 +1,4 @@
+from collections import namedtuple
 import numpy as np
 import os
 import pygame
@@ -5,6 +6,69 @@ import sys
 pygame.init()
 
 
+# Immutable copy of everything needed to draw one frame of the game. Produced by Game.get_snapshot(), so that a frame
+# can be drawn while the simulation keeps running (see pipeline.py).
+GameSnapshot = namedtuple('GameSnapshot', ['tick', 'input_time', 'positions', 'crosshairs', 'bullet_positions',
+                                           'scores'])
+
+
+class PhysicsConfig:
+    """
+    Class for holding the balance constants of the game's physics, so they can be tuned without editing the code.
+
+    Attributes:
+        - thrust: Acceleration given to a player by the movement actions. Number.
+        - friction: Deceleration of a moving player, opposing its velocity. Number.
+        - max_speed: Maximum speed for the players. Number.
+        - stop_speed: Players slower than this are stopped. Number.
+        - shooting_speed: Speed of the players' bullets when shot. Number.
+        - crosshair_speed: Distance moved by a crosshair in each update, by the 'ch_*' actions. Number.
+        - wall_restitution: Fraction of a player's speed kept when bouncing off walls and obstacles. Number.
+        - slowdown_factor: Each update simulates 1/(60*slowdown_factor) seconds. Number.
+    """
+
+    PARAMETERS = ['thrust', 'friction', 'max_speed', 'stop_speed', 'shooting_speed', 'crosshair_speed',
+                  'wall_restitution', 'slowdown_factor']
+
+    def __init__(self, thrust=20000, friction=3000, max_speed=1500, stop_speed=30, shooting_speed=3000,
+                 crosshair_speed=30, wall_restitution=0.8, slowdown_factor=2):
+        """
+        Initializes a physics configuration. The default values are the game's standard physics.
+        """
+        self.thrust = thrust
+        self.friction = friction
+        self.max_speed = max_speed
+        self.stop_speed = stop_speed
+        self.shooting_speed = shooting_speed
+        self.crosshair_speed = crosshair_speed
+        self.wall_restitution = wall_restitution
+        self.slowdown_factor = slowdown_factor
+
+    def replace(self, **changes):
+        """
+        Returns a copy of this configuration, with some of its constants changed.
+
+        :param changes: New values for the constants, by name.
+        :return: The new configuration.
+        :rtype: PhysicsConfig.
+        """
+        values = self.as_dict()
+        for name in changes:
+            if name not in values:
+                raise ValueError('Unknown physics parameter: %r' % name)
+        values.update(changes)
+        return PhysicsConfig(**values)
+
+    def as_dict(self):
+        """
+        Returns the constants of this configuration as a dictionary.
+        """
+        return {name: getattr(self, name) for name in self.PARAMETERS}
+
+    def __repr__(self):
+        return 'PhysicsConfig(%s)' % ', '.join('%s=%r' % item for item in self.as_dict().items())
+
+
 class Bullet:
 
     def __init__(self, color=None):
@@ -21,8 +85,9 @@ class Bullet:
         self.was_shot = False
 
     def reset_bullet(self):
-        self.position = [-100, -100]
-        self.velocity = [0, 0]
+        # Reset in place, so that references to the lists stay valid (see Game.run_until())
+        self.position[0] = self.position[1] = -100
+        self.velocity[0] = self.velocity[1] = 0
         self.was_shot = False
 
     def update(self, delta_t):
@@ -47,8 +112,9 @@ class Player:
     Before creating an instance of this class, the video mode has to be set (e.g. by creating a Game instance).
 
     Attributes:
-        - MAX_SPEED: Maximum speed for the player. Constant number.
-        - SHOOTING_SPEED: Speed of the player's bullets when shot. Constant number.
+        - config: The physics constants used to update the player. PhysicsConfig object.
+        - MAX_SPEED: Maximum speed for the player. Read-only, taken from `config`. Number.
+        - SHOOTING_SPEED: Speed of the player's bullets when shot. Read-only, taken from `config`. Number.
         - img: Image of the player, used to draw it. Surface.
         - position: Position of the player. Array with two elements.
         - velocity: Velocity of the player. Array with two elements.
@@ -58,7 +124,7 @@ class Player:
         - bullet: The bullet of the player. Bullet object.
         - score: The player's score. Number.
     """
-    def __init__(self, position=None, sz=100, player_color=None, video_mode=True):
+    def __init__(self, position=None, sz=100, player_color=None, video_mode=True, config=None):
         """
         Initialize a player instance.
 
@@ -70,10 +136,13 @@ class Player:
         :type player_color: Array with three values.
         :param video_mode: Whether or not this player is in a game with graphical display. Default value is True.
         :type video_mode: Boolean.
+        :param config: The physics constants used to update the player. Default value is PhysicsConfig().
+        :type config: PhysicsConfig.
         """
 
-        self.MAX_SPEED = 1500
-        self.SHOOTING_SPEED = 3000
+        if config is None:
+            config = PhysicsConfig()
+        self.config = config
 
         # Default value for position
         if position is None:
@@ -119,6 +188,14 @@ class Player:
         # Points initialization
         self.score = 0
 
+    @property
+    def MAX_SPEED(self):
+        return self.config.max_speed
+
+    @property
+    def SHOOTING_SPEED(self):
+        return self.config.shooting_speed
+
     def get_rect(self):
         """
         Return a newly-created Rect object, with it's `center` attribute at the same position as the player.
@@ -151,6 +228,10 @@ class Player:
         A key with value False means that the corresponding action will not be executed. If 'ch_mouse' is not False,
         all the other 'ch_*' actions are ignored.
 
+        Optionally, the dictionary can also contain the key 'mouse_pos', with the mouse position sampled when the
+        actions were chosen. It's used instead of querying the mouse, so that the update doesn't depend on when (or in
+        which thread) it's executed.
+
         Player's move according to a simple discretized CA model. The action taken at time step 'i' influences directly
         the acceleration at time step 'i+1'.
 
@@ -160,68 +241,100 @@ class Player:
         :type delta_t: float
         """
 
-        alpha = 20000
-        k = 3000
+        self.apply_actions(*self.parse_actions(actions), delta_t)
+
+    @staticmethod
+    def parse_actions(actions):
+        """
+        Converts a dictionary of actions, as taken by update(), to the first two arguments of apply_actions().
+
+        :param actions: Dictionary of actions that the player chose to take in this time step.
+        :type actions: Dictionary with keys of the type string.
+        :return: The actions, in the order of Game.get_names_possible_actions(), and the mouse position used by
+            'ch_mouse' (None if it isn't used).
+        :rtype: Tuple with two elements.
+        """
+        mouse_pos = None
+        if actions['ch_mouse']:
+            mouse_pos = actions['mouse_pos'] if 'mouse_pos' in actions else pygame.mouse.get_pos()
+        return [actions[name] for name in Game.get_names_possible_actions()], mouse_pos
+
+    def apply_actions(self, actions, mouse_pos, delta_t):
+        """
+        Same as update(), with the actions given as a list instead of a dictionary, which is faster. The player's lists
+        (position, velocity, etc.) are modified in place.
 
-        # Update position (CA model)
-        self.position[0] += self.velocity[0] * delta_t + self.acceleration[0] * (delta_t ** 2) / 2
-        self.position[1] += self.velocity[1] * delta_t + self.acceleration[1] * (delta_t ** 2) / 2
+        :param actions: Whether each action is taken, in the order of Game.get_names_possible_actions().
+        :type actions: List of booleans.
+        :param mouse_pos: Position that the crosshair is moved to, if 'ch_mouse' is taken.
+        :type mouse_pos: Tuple with two elements.
+        :param delta_t: How much time passed since the last update
+        :type delta_t: float
+        :return: Whether the player shot its bullet.
+        :rtype: Boolean.
+        """
+        config = self.config
+        position = self.position
+        velocity = self.velocity
+        acceleration = self.acceleration
 
-        # Update velocity (CA model)
-        self.velocity[0] += self.acceleration[0] * delta_t
-        self.velocity[1] += self.acceleration[1] * delta_t
+        # Update position and velocity (CA model)
+        position[0] += velocity[0] * delta_t + acceleration[0] * (delta_t ** 2) / 2
+        position[1] += velocity[1] * delta_t + acceleration[1] * (delta_t ** 2) / 2
+        velocity[0] += acceleration[0] * delta_t
+        velocity[1] += acceleration[1] * delta_t
 
         # Update acceleration
-        thrust = [actions['right'] - actions['left'],
-                  actions['down'] - actions['up']]
-        thrust_mag = (thrust[0] ** 2 + thrust[1] ** 2) ** 0.5
-        if thrust_mag > 0:
-            self.acceleration[0] = alpha * thrust[0] / thrust_mag
-            self.acceleration[1] = alpha * thrust[1] / thrust_mag
+        thrust_x = actions[Policy.RIGHT] - actions[Policy.LEFT]
+        thrust_y = actions[Policy.DOWN] - actions[Policy.UP]
+        if thrust_x or thrust_y:
+            thrust_mag = (thrust_x ** 2 + thrust_y ** 2) ** 0.5
+            acceleration[0] = config.thrust * thrust_x / thrust_mag
+            acceleration[1] = config.thrust * thrust_y / thrust_mag
         else:
-            self.acceleration = [0, 0]
+            acceleration[0] = acceleration[1] = 0
 
         # Limit maximum speed
-        speed = (self.velocity[0] ** 2 + self.velocity[1] ** 2) ** 0.5
-        if speed > self.MAX_SPEED:
-            limiting_factor = self.MAX_SPEED/speed
-            self.velocity[0] *= limiting_factor
-            self.velocity[1] *= limiting_factor
+        speed = (velocity[0] ** 2 + velocity[1] ** 2) ** 0.5
+        if speed > config.max_speed:
+            limiting_factor = config.max_speed/speed
+            velocity[0] *= limiting_factor
+            velocity[1] *= limiting_factor
 
         # Threshold the velocities to zero (this makes the player stop eventually, if no acceleration is given)
-        if speed < 30:
-            self.velocity = [0, 0]
+        if speed < config.stop_speed:
+            velocity[0] = velocity[1] = 0
 
         # Add friction-like component
         if speed > 0.1:
-            self.acceleration[0] -= self.velocity[0] / speed * k
-            self.acceleration[1] -= self.velocity[1] / speed * k
+            acceleration[0] -= velocity[0] / speed * config.friction
+            acceleration[1] -= velocity[1] / speed * config.friction
 
         # Update crosshair position
-        if actions['ch_mouse']:
-            self.crosshair = pygame.mouse.get_pos()
+        crosshair = self.crosshair
+        if actions[Policy.CH_MOUSE]:
+            crosshair[0], crosshair[1] = mouse_pos
         else:
-            beta = 30
-            self.crosshair[0] += beta * (actions['ch_right'] - actions['ch_left'])
-            self.crosshair[1] += beta * (actions['ch_down'] - actions['ch_up'])
+            crosshair[0] += config.crosshair_speed * (actions[Policy.CH_RIGHT] - actions[Policy.CH_LEFT])
+            crosshair[1] += config.crosshair_speed * (actions[Policy.CH_DOWN] - actions[Policy.CH_UP])
 
         # Shoot, if player chose this action
-        if actions['shoot'] and not self.bullet.was_shot:
-
-            # Compute bullet's velocity direction
-            bullet_vel = [self.crosshair[0]-self.position[0], self.crosshair[1]-self.position[1]]
-
-            # Adjust bullet's velocity magnitude
-            bullet_speed = (bullet_vel[0] ** 2 + bullet_vel[1] ** 2) ** 0.5
-            bullet_vel[0] *= self.SHOOTING_SPEED / bullet_speed
-            bullet_vel[1] *= self.SHOOTING_SPEED / bullet_speed
-
-            # Set the bullet's attributes
-            self.bullet.position = self.position[:]
-            self.bullet.velocity = bullet_vel
-            self.bullet.was_shot = True
-
-        self.bullet.update(delta_t)
+        bullet = self.bullet
+        shot = actions[Policy.SHOOT] and not bullet.was_shot
+        if shot:
+
+            # Bullet's velocity goes towards the crosshair, with the shooting speed
+            bullet_vx = crosshair[0] - position[0]
+            bullet_vy = crosshair[1] - position[1]
+            bullet_speed = (bullet_vx ** 2 + bullet_vy ** 2) ** 0.5
+            bullet.velocity[0] = bullet_vx * (config.shooting_speed / bullet_speed)
+            bullet.velocity[1] = bullet_vy * (config.shooting_speed / bullet_speed)
+            bullet.position[0] = position[0]
+            bullet.position[1] = position[1]
+            bullet.was_shot = True
+
+        bullet.update(delta_t)
+        return shot
 
     def draw(self, scr):
         """
@@ -243,6 +356,125 @@ class Player:
         self.bullet.draw(scr)
 
 
+class Level:
+    """
+    Class for representing the static geometry of a level: rectangular obstacles (walls and cover) that players bounce
+    off and that stop bullets.
+
+    The obstacles never move, so they are indexed once, when the level is created, in a uniform grid of square cells.
+    Each cell holds the obstacles that overlap it, and collision checks only look at the cells that overlap the moving
+    object, instead of at every obstacle.
+
+    Attributes:
+        - obstacles: The level's obstacles. List of Rect objects.
+        - cell_size: Length of the side of the grid's cells. Number.
+        - origin: Position of the top-left corner of the grid. Tuple with two elements.
+        - grid: For each column and row of the grid, the indices of the obstacles overlapping that cell. List of lists
+            of lists of numbers.
+    """
+
+    def __init__(self, obstacles=None, cell_size=100):
+        """
+        Creates a level and indexes its obstacles.
+
+        :param obstacles: The level's obstacles, each one given as (left, top, width, height). Default value is no
+            obstacles.
+        :type obstacles: List of tuples with four elements, or of Rect objects.
+        :param cell_size: Length of the side of the grid's cells. Cells about the size of a player work well. Default
+            value is 100.
+        :type cell_size: Number.
+        """
+        if obstacles is None:
+            obstacles = []
+
+        self.obstacles = [pygame.Rect(obstacle) for obstacle in obstacles]
+        self.cell_size = cell_size
+
+        # The grid covers the bounding box of all obstacles
+        if self.obstacles:
+            bounds = self.obstacles[0].unionall(self.obstacles)
+        else:
+            bounds = pygame.Rect(0, 0, 1, 1)
+        self.origin = (bounds.left, bounds.top)
+        n_cols = (bounds.width - 1) // cell_size + 1
+        n_rows = (bounds.height - 1) // cell_size + 1
+        self.grid = [[[] for _ in range(n_rows)] for _ in range(n_cols)]
+
+        for j, obstacle in enumerate(self.obstacles):
+            for column in self.grid[self.__cell_range(obstacle.left, obstacle.right, 0)]:
+                for cell in column[self.__cell_range(obstacle.top, obstacle.bottom, 1)]:
+                    cell.append(j)
+
+    def __cell_range(self, start, end, axis):
+        """
+        Returns the slice of grid columns (axis 0) or rows (axis 1) overlapping the interval [start, end).
+        """
+        first = (start - self.origin[axis]) // self.cell_size
+        last = (end - 1 - self.origin[axis]) // self.cell_size
+        return slice(max(first, 0), max(last + 1, 0))
+
+    def query(self, rect):
+        """
+        Returns the obstacles that may collide with `rect`: all the obstacles in the grid cells that `rect` overlaps.
+        Some of them might not actually collide with it.
+
+        :param rect: The rectangle being checked.
+        :type rect: Rect.
+        :return: The obstacles near `rect`, without repetitions.
+        :rtype: List of Rect objects.
+        """
+        indices = set()
+        for column in self.grid[self.__cell_range(rect.left, rect.right, 0)]:
+            for cell in column[self.__cell_range(rect.top, rect.bottom, 1)]:
+                indices.update(cell)
+        return [self.obstacles[j] for j in indices]
+
+    def collides(self, rect):
+        """
+        Returns whether `rect` collides with any of the obstacles.
+
+        With few obstacles, checking all of them at once is faster than looking them up in the grid, so that's done
+        instead.
+
+        :param rect: The rectangle being checked.
+        :type rect: Rect.
+        :rtype: Boolean.
+        """
+        if len(self.obstacles) <= 32:
+            return rect.collidelist(self.obstacles) != -1
+        return rect.collidelist(self.query(rect)) != -1
+
+
+def load_level(filename, cell_size=100):
+    """
+    Loads a level from a text file.
+
+    Each line of the file holds one obstacle, as four numbers separated by whitespace: left, top, width and height, in
+    pixels. Empty lines and everything after a '#' are ignored. For example:
+
+        # Wall in the middle of the arena
+        780 200 40 400
+
+    :param filename: Path of the level file.
+    :type filename: String.
+    :param cell_size: Length of the side of the cells used to index the obstacles. Default value is 100.
+    :type cell_size: Number.
+    :return: The loaded level.
+    :rtype: Level.
+    """
+    obstacles = []
+    with open(filename) as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.split('#')[0].split()
+            if not fields:
+                continue
+            if len(fields) != 4:
+                raise ValueError('%s:%d: expected left, top, width and height, got %r' %
+                                 (filename, line_number, line.strip()))
+            obstacles.append([int(float(field)) for field in fields])
+    return Level(obstacles, cell_size)
+
+
 class Game:
     """
     Class for representing the move n' shoot game.
@@ -255,10 +487,15 @@ class Game:
         - key_pressed: Dictionary with one key for each recognized keyboard key the user can press. The values are
             either True or False, depending on whether that key was being pressed or not when the handle_events()
             method was last called.
+        - mouse_pos: Position of the mouse when the handle_events() method was last called. Tuple with two elements.
         - players: Holds all the players present in the game. Array of Player objects.
+        - tick: Number of times update_physics() was called since the game was created or reset. Number.
+        - rng: Random number generator used by the game's physics and by reset_game(). Generator.
+        - level: The level's static obstacles, or None for an empty arena. Level object.
+        - config: The physics constants used by the game and its players. PhysicsConfig object.
     """
 
-    def __init__(self, screen_sz=None, video_mode=True):
+    def __init__(self, screen_sz=None, video_mode=True, seed=None, level=None, config=None):
         """
         Initializes a game instance.
 
@@ -267,10 +504,21 @@ class Game:
         :type screen_sz: Tuple with two elements.
         :param video_mode: Whether or not to run the game's graphical display. Default value is True.
         :type video_mode: Boolean.
+        :param seed: Seed for the game's random number generator. Two games with the same seed, players and actions
+            evolve exactly the same way. Default value is None (unpredictable seed).
+        :type seed: Number.
+        :param level: The level's static obstacles. Default value is None (empty arena).
+        :type level: Level.
+        :param config: The physics constants used by the game and its players. Default value is PhysicsConfig().
+        :type config: PhysicsConfig.
         """
         if screen_sz is None:
             screen_sz = (1600, 800)
 
+        if config is None:
+            config = PhysicsConfig()
+        self.config = config
+
         self.screen_width = screen_sz[0]
         self.screen_height = screen_sz[1]
 
@@ -292,10 +540,31 @@ class Game:
         for key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_UP,
                     pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_SPACE, 'mouse_click']:
             self.key_pressed[key] = False
+        self.mouse_pos = (0, 0)
 
         # Initialize player's array
         self.players = []
 
+        self.tick = 0
+        self.rng = np.random.default_rng(seed)
+
+        self.set_level(level)
+
+    def set_level(self, level):
+        """
+        Changes the level's static obstacles. In video mode, also draws them once into the background used by every
+        frame.
+
+        :param level: The level's static obstacles, or None for an empty arena.
+        :type level: Level.
+        """
+        self.level = level
+        if self.video_mode:
+            self.background = pygame.Surface((self.screen_width, self.screen_height))
+            if level is not None:
+                for obstacle in level.obstacles:
+                    pygame.draw.rect(self.background, (120, 120, 120), obstacle)
+
     def add_player(self, position=None, player_color=None):
         """
         Adds a new player to the game. Maximum 2 players in the game.
@@ -307,12 +576,24 @@ class Game:
         """
 
         if len(self.players) < 2:
-            self.players.append(Player(position, player_color=player_color, video_mode=self.video_mode))
+            self.players.append(Player(position, player_color=player_color, video_mode=self.video_mode,
+                                       config=self.config))
 
-    def handle_events(self):
+    def handle_events(self, key_pressed=None):
         """
         Handles all events from the game (quitting, updating key presses, mouse clicks, etc).
+
+        :param key_pressed: Dictionary of key presses to update, with the same keys as `key_pressed`. Default value is
+            None (update the game's `key_pressed` and `mouse_pos`). Passing another dictionary lets a thread handle
+            events without writing the state that policies read on another thread.
+        :type key_pressed: Dictionary.
+        :return: The position of the mouse, sampled together with the key presses.
+        :rtype: Tuple with two elements.
         """
+        update_game = key_pressed is None
+        if update_game:
+            key_pressed = self.key_pressed
+
         for event in pygame.event.get():
 
             # Handle closing event
@@ -321,83 +602,195 @@ class Game:
 
             # Handle key presses
             if event.type == pygame.KEYDOWN:
-                if event.key in self.key_pressed:
-                    self.key_pressed[event.key] = True
+                if event.key in key_pressed:
+                    key_pressed[event.key] = True
 
             # Handle key releases
             if event.type == pygame.KEYUP:
-                if event.key in self.key_pressed:
-                    self.key_pressed[event.key] = False
+                if event.key in key_pressed:
+                    key_pressed[event.key] = False
 
             # Handle mouse clicks
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                self.key_pressed['mouse_click'] = True
+                key_pressed['mouse_click'] = True
             if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                self.key_pressed['mouse_click'] = False
+                key_pressed['mouse_click'] = False
+
+        # Sample the mouse position together with the key presses
+        mouse_pos = pygame.mouse.get_pos()
+        if update_game:
+            self.mouse_pos = mouse_pos
+        return mouse_pos
 
     def update_physics(self, player_actions):
         """
         Updates the game's current state, using all the player's actions and the game's physics.
 
-        Every player will have the update() method called, to decide how to parse their actions.
+        Every player will have its actions parsed by the same steps as the update() method.
 
         Physics:
             - Crosshair position is limited to the screen.
             - Player's position is limited to the screen.
             - Partially elastic collision between players and the borders of the screen.
+            - Partially elastic collision between players and the level's obstacles.
+            - Bullets are stopped by the borders of the screen and by the level's obstacles. Obstacles should be thicker
+              than the distance a bullet travels in one update, shooting_speed / (60 * slowdown_factor) pixels, or
+              bullets may go through them.
             - Perfectly elastic collision between players.
         """
-        slowdown_factor = 2
+        slowdown_factor = self.config.slowdown_factor
         delta_t = 1/(60*slowdown_factor)
 
         # For each player
         for i, player in enumerate(self.players):
 
-            # Decide actions for player
-            actions = player_actions[i]
+            # Update player and parse its collisions, using its chosen actions
+            self.__update_player(i, *player.parse_actions(player_actions[i]), delta_t)
 
-            # Update player using chosen actions
-            player.update(actions, delta_t)
+        # Parse collision between players (if there are two players in the game)
+        if len(self.players) == 2:
+            self.__collide_players()
 
-            # Limit crosshair position
-            if player.crosshair[0] < 0:
-                player.crosshair[0] = 0
-            if player.crosshair[0] > self.screen_width:
-                player.crosshair[0] = self.screen_width
-            if player.crosshair[1] < 0:
-                player.crosshair[1] = 0
-            if player.crosshair[1] > self.screen_height:
-                player.crosshair[1] = self.screen_height
+        self.tick += 1
 
-            # Check collisions with walls
+    def __update_player(self, i, actions, mouse_pos, delta_t):
+        """
+        Updates player `i` with Player.apply_actions(), and then parses its collisions and its bullet's, as described in
+        update_physics().
+
+        Rect objects are only created when they're needed: a rectangle's sides are at whole pixels, since its center is
+        rounded with halfway cases away from zero, so e.g. `rect.left < 0` is the same as `x < w//2 - 0.5`, and the
+        walls are checked on the position instead. The bullet is only checked against the other player if they are
+        close.
+
+        :return: Whether the player shot, whether it hit the other player, and how many times it bounced off the walls
+            and off obstacles.
+        :rtype: Tuple with four elements.
+        """
+        player = self.players[i]
+        width = self.screen_width
+        height = self.screen_height
+        shot = player.apply_actions(actions, mouse_pos, delta_t)
+
+        # Limit crosshair position
+        crosshair = player.crosshair
+        if crosshair[0] < 0:
+            crosshair[0] = 0
+        if crosshair[0] > width:
+            crosshair[0] = width
+        if crosshair[1] < 0:
+            crosshair[1] = 0
+        if crosshair[1] > height:
+            crosshair[1] = height
+
+        # Check collisions with nearby obstacles. Walls are checked last, so the player always ends up on screen
+        obstacle_collisions = 0
+        if self.level is not None:
             r = player.get_rect()
-            if r.left < 0:
-                player.position[0] = r.width / 2
-                player.velocity[0] = -player.velocity[0]*0.8
-            if r.top < 0:
-                player.position[1] = r.height / 2
-                player.velocity[1] = -player.velocity[1]*0.8
-            if r.right > self.screen_width:
-                player.position[0] = self.screen_width - r.width / 2
-                player.velocity[0] = -player.velocity[0]*0.8
-            if r.bottom > self.screen_height:
-                player.position[1] = self.screen_height - r.height / 2
-                player.velocity[1] = -player.velocity[1]*0.8
-
-            # Check bullet collision with walls
-            r = player.bullet.get_rect()
-            if (r.right < 0 or r.bottom < 0 or r.left > self.screen_width or r.top > self.screen_height) \
-                    and player.bullet.was_shot:
-                player.bullet.reset_bullet()
-
-            # Check bullet collision with the other player
-            if r.colliderect(self.players[1-i].get_rect()):
+            if self.level.collides(r):
+                for obstacle in self.level.query(r):
+                    obstacle_collisions += self.__parse_obstacle_collision(player, obstacle)
+
+        # Check collisions with walls
+        wall_collisions = 0
+        w, h = player.img.get_size()
+        x, y = player.position
+        if x < w//2 - 0.5:
+            self.__bounce(player, 0, w / 2)
+            wall_collisions += 1
+        if y < h//2 - 0.5:
+            self.__bounce(player, 1, h / 2)
+            wall_collisions += 1
+        if x >= width + w//2 - w + 0.5:
+            self.__bounce(player, 0, width - w / 2)
+            wall_collisions += 1
+        if y >= height + h//2 - h + 0.5:
+            self.__bounce(player, 1, height - h / 2)
+            wall_collisions += 1
+
+        # Check bullet collision with walls
+        bullet = player.bullet
+        bx, by = bullet.position
+        bw, bh = bullet.img.get_size()
+        if (bx <= bw//2 - bw - 0.5 or by <= bh//2 - bh - 0.5 or bx >= width + bw//2 + 0.5 or
+                by >= height + bh//2 + 0.5) and bullet.was_shot:
+            bullet.reset_bullet()
+
+        # Check bullet collision with nearby obstacles
+        if self.level is not None and bullet.was_shot and self.level.collides(bullet.get_rect()):
+            bullet.reset_bullet()
+
+        # Check bullet collision with the other player, at the bullet's position before the checks above
+        hit = False
+        other = self.players[1-i]
+        if abs(bx - other.position[0]) < (other.img.get_width() + bw) / 2 + 1 and \
+                abs(by - other.position[1]) < (other.img.get_height() + bh) / 2 + 1:
+            r = bullet.img.get_rect()
+            r.center = (bx, by)
+            if r.colliderect(other.get_rect()):
                 player.score += 1
-                player.bullet.reset_bullet()
+                bullet.reset_bullet()
+                hit = True
 
-        # Parse collision between players (if there are two players in the game)
-        if len(self.players) == 2:
-            self.__parse_player_collision(self.players[0], self.players[1])
+        return shot, hit, wall_collisions, obstacle_collisions
+
+    def __collide_players(self):
+        """
+        Parses the collision between the two players with __parse_player_collision(), only if they are close.
+
+        :return: Whether the players were colliding.
+        :rtype: Boolean.
+        """
+        player1, player2 = self.players
+        reach_x = (player1.img.get_width() + player2.img.get_width()) / 2 + 1
+        reach_y = (player1.img.get_height() + player2.img.get_height()) / 2 + 1
+        if abs(player1.position[0] - player2.position[0]) < reach_x and \
+                abs(player1.position[1] - player2.position[1]) < reach_y:
+            return self.__parse_player_collision(player1, player2)
+        return False
+
+    def __bounce(self, player, axis, position):
+        """
+        Partially elastic collision of a player with a wall perpendicular to `axis` (0 for x, 1 for y): the player is
+        moved to `position` along that axis, and its velocity along that axis is reversed and reduced.
+        """
+        player.position[axis] = position
+        player.velocity[axis] = -player.velocity[axis]*self.config.wall_restitution
+
+    def __parse_obstacle_collision(self, player, obstacle):
+        """
+        Checks if a player is colliding with an obstacle. If it is, the player bounces off the side of the obstacle that
+        it penetrated the least, as it would off a wall. If there's no room for the player between that side and the
+        border of the screen, but there is on the opposite side, it's pushed out through the opposite side instead.
+
+        :param player: The player that might be colliding.
+        :type player: Player.
+        :param obstacle: The obstacle that might be colliding.
+        :type obstacle: Rect.
+        :return: Whether the player was colliding.
+        :rtype: Boolean.
+        """
+        r = player.get_rect()
+        if not r.colliderect(obstacle):
+            return False
+
+        overlap_x = min(r.right, obstacle.right) - max(r.left, obstacle.left)
+        overlap_y = min(r.bottom, obstacle.bottom) - max(r.top, obstacle.top)
+        if overlap_x < overlap_y:
+            axis, half, size = 0, r.width / 2, self.screen_width
+            start, center, end = obstacle.left, obstacle.centerx, obstacle.right
+        else:
+            axis, half, size = 1, r.height / 2, self.screen_height
+            start, center, end = obstacle.top, obstacle.centery, obstacle.bottom
+
+        before = player.position[axis] < center
+        fits_before = start - half >= 0
+        fits_after = end + half <= size
+        if fits_before != fits_after:
+            before = fits_before
+
+        self.__bounce(player, axis, start - half if before else end + half)
+        return True
 
     def __parse_player_collision(self, player1, player2):
         """
@@ -422,6 +815,8 @@ class Game:
         :type player1: Player.
         :param player2: The second player involved in the collision.
         :type player2: Player.
+        :return: Whether the players were colliding.
+        :rtype: Boolean.
         """
 
         # Initializations
@@ -445,8 +840,8 @@ class Game:
 
             # If both players had zero velocity when the collision was being parsed, resolve by randomly separating them
             if v_x == 0 and v_y == 0:
-                v_x = np.random.rand()
-                v_y = np.random.rand()
+                v_x = self.rng.random()
+                v_y = self.rng.random()
 
             # Compute the time for each collision direction
             delta_tx = delta_x / v_x if v_x > 0 else float('inf')
@@ -473,33 +868,229 @@ class Game:
                     # Switch players' velocities in this direction
                     (player1.velocity[i], player2.velocity[i]) = (player2.velocity[i], player1.velocity[i])
 
-    def draw_frame(self):
+            return True
+
+        return False
+
+    def run_until(self, policies, stop_condition=None, max_ticks=None):
         """
-        Draws the current game state to the screen. Limited to max 60 fps.
+        Runs a headless match until `stop_condition` returns True or `max_ticks` updates were made, and returns summary
+        statistics of the run. The stop condition is checked before every update, so nothing is run if it already holds.
+
+        The result is exactly the same as calling the policies and update_physics() in a loop, and the players are
+        updated by the same methods, but faster: no events are handled, nothing is drawn, actions aren't converted to
+        dictionaries, and the random actions of Policy instances are planned many ticks at a time (see Policy.plan()).
+
+        :param policies: One action generator per player, called as policy(player_index, game_instance). Policy
+            instances take the fast path, unless the same instance is used for both players.
+        :type policies: List of functions or Policy objects.
+        :param stop_condition: Called as stop_condition(game_instance) before every update. The run stops when it
+            returns True. Default value is None (run for `max_ticks` updates).
+        :type stop_condition: Function.
+        :param max_ticks: Maximum number of updates. Default value is None (no limit).
+        :type max_ticks: Number.
+        :return: Dictionary with the following keys:
+            - 'ticks': Number of updates made.
+            - 'scores': Score of each player at the end of the run.
+            - 'hits': Number of times each player hit the opponent during the run.
+            - 'shots': Number of bullets shot by each player during the run.
+            - 'wall_collisions': Number of times each player bounced off the borders of the screen.
+            - 'obstacle_collisions': Number of times each player bounced off the level's obstacles.
+            - 'player_collisions': Number of collisions between the players.
+        :rtype: Dictionary
         """
-        # If video_mode is False, do nothing
-        if not self.video_mode:
-            return
+        if len(self.players) != 2:
+            raise ValueError('run_until() needs a game with two players, got %d' % len(self.players))
+        if stop_condition is None and max_ticks is None:
+            raise ValueError('run_until() needs a stop_condition or max_ticks')
+
+        delta_t = 1/(60*self.config.slowdown_factor)
+        players = self.players
+        update_player = self.__update_player
+        CH_UP, CH_DOWN, CH_LEFT, CH_RIGHT, CH_MOUSE = (Policy.CH_UP, Policy.CH_DOWN, Policy.CH_LEFT, Policy.CH_RIGHT,
+                                                       Policy.CH_MOUSE)
+
+        # Planned random actions of each Policy, see Policy.plan(). A Policy shared by both players can't be planned
+        # for each of them separately, so it's called like any other action generator
+        shared = policies[0] is policies[1]
+        is_policy = [isinstance(policy, Policy) and not shared for policy in policies]
+        plan_length = 256
+        plans = [None, None]
+        n_planned = [0, 0]
+        last_actions = [None, None]
+
+        hits = [0, 0]
+        shots = [0, 0]
+        wall_collisions = [0, 0]
+        obstacle_collisions = [0, 0]
+        player_collisions = 0
+        ticks = 0
+
+        all_actions = [None, None]
+        mouse_positions = [None, None]
+        try:
+            while max_ticks is None or ticks < max_ticks:
+                if stop_condition is not None and stop_condition(self):
+                    break
+
+                # Decide actions for both players, before updating any of them
+                for i in (0, 1):
+                    policy = policies[i]
+                    if is_policy[i]:
+                        if plans[i] is None or n_planned[i] == plan_length:
+                            if plans[i] is not None:
+                                policy.commit(n_planned[i], last_actions[i])
+                            plans[i] = policy.plan(plan_length)
+                            n_planned[i] = 0
+                            last_actions[i] = policy.old_actions[0].tolist()
+
+                        # Same as Policy.act()
+                        actions = last_actions[i][:]
+                        actions[policy.TOGGLED_ACTIONS] = plans[i][n_planned[i]]
+                        n_planned[i] += 1
+                        actions[CH_MOUSE] = False
+                        player = players[i]
+                        target = policy.aim(player, players[1-i])
+                        if target is not None:
+                            actions[CH_UP] = target[1] < player.crosshair[1]
+                            actions[CH_DOWN] = target[1] > player.crosshair[1]
+                            actions[CH_LEFT] = target[0] < player.crosshair[0]
+                            actions[CH_RIGHT] = target[0] > player.crosshair[0]
+                        last_actions[i] = actions
+                        all_actions[i] = actions
+                    else:
+                        all_actions[i], mouse_positions[i] = Player.parse_actions(policy(i, self))
+
+                # Same as update_physics()
+                for i in (0, 1):
+                    shot, hit, n_walls, n_obstacles = update_player(i, all_actions[i], mouse_positions[i], delta_t)
+                    shots[i] += shot
+                    hits[i] += hit
+                    wall_collisions[i] += n_walls
+                    obstacle_collisions[i] += n_obstacles
+                player_collisions += self.__collide_players()
+
+                self.tick += 1
+                ticks += 1
+        finally:
+            # Pending plans are committed even if a policy or the stop condition raised, so the policies' random
+            # generators stay in step with the actions that were taken
+            for i in (0, 1):
+                if plans[i] is not None:
+                    policies[i].commit(n_planned[i], last_actions[i])
+
+        return {'ticks': ticks,
+                'scores': [p.score for p in players],
+                'hits': hits,
+                'shots': shots,
+                'wall_collisions': wall_collisions,
+                'obstacle_collisions': obstacle_collisions,
+                'player_collisions': player_collisions}
+
+    def save_state(self):
+        """
+        Returns a copy of the game's simulation state: everything that update_physics() reads or writes, including the
+        state of the game's random number generator.
 
-        # Black background
-        self.screen.fill((0, 0, 0))
+        The copy is a flat tuple, which is cheap to create and safe to keep around (e.g. one per tick, for rollback).
 
-        # Draw all players
-        for player in self.players:
-            player.draw(self.screen)
+        :return: The simulation state.
+        :rtype: Tuple.
+        """
+        state = [self.tick]
+        for p in self.players:
+            b = p.bullet
+            state += (p.position[0], p.position[1], p.velocity[0], p.velocity[1],
+                      p.acceleration[0], p.acceleration[1], p.crosshair[0], p.crosshair[1],
+                      b.position[0], b.position[1], b.velocity[0], b.velocity[1], b.was_shot, p.score)
+        state.append(self.rng.bit_generator.state)
+        return tuple(state)
+
+    def load_state(self, state):
+        """
+        Restores a simulation state returned by save_state(), in place: the players and bullets are updated, but not
+        replaced, so references to them stay valid.
+
+        :param state: The simulation state to restore, saved from a game with the same number of players.
+        :type state: Tuple.
+        """
+        self.tick = state[0]
+        j = 1
+        for p in self.players:
+            b = p.bullet
+            (p.position[0], p.position[1], p.velocity[0], p.velocity[1],
+             p.acceleration[0], p.acceleration[1], p.crosshair[0], p.crosshair[1],
+             b.position[0], b.position[1], b.velocity[0], b.velocity[1], b.was_shot, p.score) = state[j:j+14]
+            j += 14
+        self.rng.bit_generator.state = state[j]
+
+    def get_snapshot(self, input_time=None):
+        """
+        Returns an immutable copy of the game's current state, with everything needed to draw it.
+
+        :param input_time: Time at which the inputs used in the last update were sampled. Default value is None.
+        :type input_time: Number.
+        :return: Snapshot of the current game state.
+        :rtype: GameSnapshot.
+        """
+        return GameSnapshot(tick=self.tick,
+                            input_time=input_time,
+                            positions=tuple((p.position[0], p.position[1]) for p in self.players),
+                            crosshairs=tuple((p.crosshair[0], p.crosshair[1]) for p in self.players),
+                            bullet_positions=tuple((p.bullet.position[0], p.bullet.position[1]) for p in self.players),
+                            scores=tuple(p.score for p in self.players))
+
+    def draw_snapshot(self, snapshot):
+        """
+        Draws a game state to the screen, without flipping the display.
+
+        Only the snapshot is read, so this can be called while another thread is updating the game.
+
+        :param snapshot: The game state to be drawn.
+        :type snapshot: GameSnapshot.
+        """
+
+        # Black background, with the level's obstacles
+        self.screen.blit(self.background, (0, 0))
+
+        # Draw all players, their crosshairs and their bullets
+        for i, player in enumerate(self.players):
+            r = player.img.get_rect()
+            r.center = snapshot.positions[i]
+            self.screen.blit(player.img, r)
+
+            r = player.crosshair_img.get_rect()
+            r.center = snapshot.crosshairs[i]
+            self.screen.blit(player.crosshair_img, r)
+
+            r = player.bullet.img.get_rect()
+            r.center = snapshot.bullet_positions[i]
+            self.screen.blit(player.bullet.img, r)
 
         # Draw players' scores
-        score_player1 = self.my_font.render('P1: ' + str(self.players[0].score), False, (255, 255, 255))
-        score_player2 = self.my_font.render('P2: ' + str(self.players[1].score), False, (255, 255, 255))
+        score_player1 = self.my_font.render('P1: ' + str(snapshot.scores[0]), False, (255, 255, 255))
+        score_player2 = self.my_font.render('P2: ' + str(snapshot.scores[1]), False, (255, 255, 255))
         self.screen.blit(score_player1, (0, 0))
         self.screen.blit(score_player2, (0, 40))
 
+    def draw_frame(self):
+        """
+        Draws the current game state to the screen. Limited to max 60 fps.
+        """
+        # If video_mode is False, do nothing
+        if not self.video_mode:
+            return
+
+        self.draw_snapshot(self.get_snapshot())
+
         # Flip the display and limit frame-rate
         pygame.display.flip()
         self.clock.tick(60)
 
     def reset_game(self):
 
+        self.tick = 0
+
         # For all players
         for player in self.players:
 
@@ -510,8 +1101,10 @@ class Game:
             player.acceleration = [0, 0]
 
             # Randomizes position and crosshair position
-            player.position = [np.random.randint(0, self.screen_width), np.random.randint(0, self.screen_height)]
-            player.crosshair = [np.random.randint(0, self.screen_width), np.random.randint(0, self.screen_height)]
+            player.position = [int(self.rng.integers(0, self.screen_width)),
+                               int(self.rng.integers(0, self.screen_height))]
+            player.crosshair = [int(self.rng.integers(0, self.screen_width)),
+                                int(self.rng.integers(0, self.screen_height))]
 
 
     @staticmethod
@@ -544,80 +1137,213 @@ def get_human_player_action(game_instance):
         actions[action_name] = game_instance.key_pressed[key_binding]
 
     actions['ch_mouse'] = True
+    actions['mouse_pos'] = game_instance.mouse_pos
     return actions
 
 
-def create_random_player_action_generator(prob_action=0.05):
+def get_observations(game_instances, player_indices):
     """
-    Creates an action generator for a random player.
+    Returns the observations of many players, possibly from many games, stacked so that a policy's act_batch() method
+    can decide all of their actions in a single call.
+
+    The observations are a dictionary, where each value is an array with one row per player:
+        - 'position': Position of the player. Shape (n, 2).
+        - 'velocity': Velocity of the player. Shape (n, 2).
+        - 'crosshair': Position of the player's crosshair. Shape (n, 2).
+        - 'opponent_position': Position of the player's opponent. Shape (n, 2).
+        - 'opponent_velocity': Velocity of the player's opponent. Shape (n, 2).
+        - 'shooting_speed': Speed of the player's bullets, from its game's physics constants. Shape (n,).
+
+    :param game_instances: The Game instance that each player belongs to.
+    :type game_instances: List of Game.
+    :param player_indices: The index of each player in its game.
+    :type player_indices: List of numbers.
+    :return: Dictionary of observations, with one row per player.
+    :rtype: Dictionary
+    """
+    players = [g.players[i] for g, i in zip(game_instances, player_indices)]
+    opponents = [g.players[1-i] for g, i in zip(game_instances, player_indices)]
+    return {'position': np.array([p.position for p in players], dtype=float),
+            'velocity': np.array([p.velocity for p in players], dtype=float),
+            'crosshair': np.array([p.crosshair for p in players], dtype=float),
+            'opponent_position': np.array([p.position for p in opponents], dtype=float),
+            'opponent_velocity': np.array([p.velocity for p in opponents], dtype=float),
+            'shooting_speed': np.array([p.config.shooting_speed for p in players], dtype=float)}
 
-    It's necessary to have this layer of abstraction above the get_random_player_action function, so that two instances
-    of this function can be used in parallel (otherwise both would share the same `old_actions` attribute.
-    :param prob_action: Probability that an action will take the opposite value it had the last time the
-    get_random_player_action function was called.
-    :return: An instance of the get_random_player_action function.
+
+def actions_to_dicts(actions):
+    """
+    Converts a batch of actions, as returned by a policy's act_batch() method, to one dictionary of actions per player,
+    as expected by Game.update_physics().
+
+    :param actions: Boolean array of shape (n, number of possible actions). Columns are in the same order as
+        Game.get_names_possible_actions().
+    :type actions: Array.
+    :return: One dictionary of actions per row of `actions`.
+    :rtype: List of dictionaries.
+    """
+    names = Game.get_names_possible_actions()
+    return [dict(zip(names, row)) for row in actions.tolist()]
+
+
+class Policy:
+    """
+    Base class for the AI players' policies.
+
+    A policy decides the actions of many players at once, through act_batch(). It keeps its own state (e.g. the actions
+    taken in the last call) for each of those players, so the same instance must always be called with the same batch
+    of players, in the same order. Use one instance per batch of players, and call reset() when starting a new batch.
+
+    Random numbers come from the policy's own generator, seeded with `seed`, and are drawn in blocks of `block_size`
+    numbers, which are then consumed in order. The actions are therefore reproducible for a given seed, regardless of
+    the block size.
+
+    Instances can also be called like the action generator functions, as policy(player_index, game_instance), which
+    decides the actions of a single player and returns them as a dictionary. This consumes the same random numbers,
+    and gives the same actions, as calling act_batch() with that single player.
+
+    Subclasses decide where the crosshair goes by overriding aim_batch() and aim().
+
+    Attributes:
+        - prob_action: Probability that a toggled action takes the opposite value it had in the last call. Number.
+        - seed: Seed of the policy's random number generator. Number, or None for an unpredictable seed.
+        - block_size: How many random numbers are generated at a time. Number.
+        - rng: The policy's random number generator. Generator.
+        - old_actions: Actions returned in the last call, or None before the first call. Boolean array.
     """
 
-    def get_random_player_action(player_index, game_instance):
+    # Column of each action in the actions array, in the order of Game.get_names_possible_actions()
+    UP, DOWN, LEFT, RIGHT, SHOOT, CH_UP, CH_DOWN, CH_LEFT, CH_RIGHT, CH_MOUSE = (
+        Game.get_names_possible_actions().index(name)
+        for name in ('up', 'down', 'left', 'right', 'shoot', 'ch_up', 'ch_down', 'ch_left', 'ch_right', 'ch_mouse'))
+
+    # Number of possible actions, and which of them are toggled randomly: the movement and shooting (contiguous columns)
+    N_ACTIONS = len(Game.get_names_possible_actions())
+    TOGGLED_ACTIONS = slice(min(UP, DOWN, LEFT, RIGHT, SHOOT), max(UP, DOWN, LEFT, RIGHT, SHOOT) + 1)
+
+    def __init__(self, prob_action=0.05, seed=None, block_size=4096):
+        """
+        :param prob_action: Probability that a toggled action takes the opposite value it had in the last call. Default
+            value is 0.05.
+        :type prob_action: Number.
+        :param seed: Seed for the policy's random number generator. Default value is None (unpredictable seed).
+        :type seed: Number.
+        :param block_size: How many random numbers are generated at a time. Default value is 4096.
+        :type block_size: Number.
         """
-        Returns the actions for a random player.
+        self.prob_action = prob_action
+        self.seed = seed
+        self.block_size = block_size
+        self.reset()
 
-        For each key in the dictionary, with probability `prob_action`, the
-        corresponding value will be the opposite of the value chosen the last time this functions was called. With
-        probability 1-`prob_action`, it will have the same value as before. All values are False the first time this
-        function is called.
+    def reset(self):
+        """
+        Resets the policy's state and random number generator, as if it had just been created.
+        """
+        self.rng = np.random.default_rng(self.seed)
+        self._block = np.empty(0)
+        self._block_pos = 0
+        self.old_actions = None
 
-        :return: Dictionary of actions that this player will take this turn. Keys are the actions, values are booleans
-            representing whether or not that action will be taken this turn.
-        :rtype: Dictionary
+    def random(self, n):
+        """
+        Returns an array with the next `n` uniformly distributed numbers in [0, 1) from the policy's random number
+        generator.
         """
+        values = self.peek_random(n)
+        self._block_pos += n
+        return values
 
-        action_names = ['up', 'down', 'left', 'right', 'shoot', 'ch_up', 'ch_down', 'ch_left', 'ch_right']
+    def peek_random(self, n):
+        """
+        Same as random(), but without consuming the numbers: the next call returns them again.
+        """
+        if self._block_pos + n > len(self._block):
+            remaining = self._block[self._block_pos:]
+            self._block = np.concatenate((remaining, self.rng.random(max(self.block_size, n - len(remaining)))))
+            self._block_pos = 0
+        return self._block[self._block_pos:self._block_pos+n]
 
-        # Initialize old actions
-        if not hasattr(get_random_player_action, 'old_actions'):
-            get_random_player_action.old_actions = {}
-            for action in action_names:
-                get_random_player_action.old_actions[action] = False
+    def plan(self, n_calls):
+        """
+        Returns the values that the toggled actions will take in each of the next `n_calls` calls of act(), for a single
+        player. They don't depend on the game, so they can all be computed at once.
 
-        # For each action
-        actions = {}
-        for action in action_names:
+        Nothing is consumed: after using some of the planned values, call commit() to bring the policy's state up to
+        date, as if act() had been called.
 
-            # With probability 'prob_action', do the opposite of what was done in the last call of this function
-            r = np.random.rand()
-            if r < prob_action:
-                actions[action] = not get_random_player_action.old_actions[action]
-            else:
-                actions[action] = get_random_player_action.old_actions[action]
+        :param n_calls: Number of calls to plan for.
+        :type n_calls: Number
+        :return: For each call, the values of the toggled actions, in the order of Game.get_names_possible_actions().
+        :rtype: List of lists of booleans.
+        """
+        if self.old_actions is None:
+            self.old_actions = np.zeros((1, self.N_ACTIONS), dtype=bool)
+        elif len(self.old_actions) != 1:
+            raise ValueError('Policy was called with 1 player, but it holds state for %d players. Call reset() before '
+                             'using it with another batch.' % len(self.old_actions))
+
+        n_toggled = self.TOGGLED_ACTIONS.stop - self.TOGGLED_ACTIONS.start
+        flips = self.peek_random(n_calls * n_toggled).reshape(n_calls, n_toggled) < self.prob_action
+        toggled = np.vstack((self.old_actions[:, self.TOGGLED_ACTIONS], flips))
+        return np.logical_xor.accumulate(toggled, axis=0)[1:].tolist()
+
+    def commit(self, n_calls, last_actions):
+        """
+        Consumes the random numbers of `n_calls` planned calls of act(), and stores the actions of the last one.
 
-        # Don't use the mouse
-        actions['ch_mouse'] = False
+        :param n_calls: Number of planned calls that were used.
+        :type n_calls: Number
+        :param last_actions: All the actions taken in the last call, in the order of Game.get_names_possible_actions().
+        :type last_actions: List of booleans.
+        """
+        if n_calls > 0:
+            self._block_pos += n_calls * (self.TOGGLED_ACTIONS.stop - self.TOGGLED_ACTIONS.start)
+            self.old_actions = np.array([last_actions])
 
-        # Update the old actions
-        get_random_player_action.old_actions = actions.copy()
+    def act_batch(self, observations):
+        """
+        Returns the actions for a batch of players.
 
-        return actions
+        With probability `prob_action`, each of the toggled actions takes the opposite value it had in the last call.
+        With probability 1-`prob_action`, it keeps the same value. All values are False before the first call.
+        Subclasses decide the remaining actions.
 
-    return get_random_player_action
+        :param observations: Observations of the players, as returned by get_observations().
+        :type observations: Dictionary
+        :return: Boolean array of shape (n, number of possible actions), one row per player. Columns are in the same
+            order as Game.get_names_possible_actions().
+        :rtype: Array.
+        """
+        n = len(observations['position'])
+        if self.old_actions is None:
+            self.old_actions = np.zeros((n, self.N_ACTIONS), dtype=bool)
+        elif len(self.old_actions) != n:
+            raise ValueError('Policy was called with %d players, but it holds state for %d players. Call reset() '
+                             'before using it with another batch.' % (n, len(self.old_actions)))
 
+        actions = self.old_actions.copy()
+        toggled = actions[:, self.TOGGLED_ACTIONS]
+        toggled ^= self.random(toggled.size).reshape(toggled.shape) < self.prob_action
 
-def create_simple_ai_action_generator(prob_action=0.05):
-    """
-    Creates an action generator for a simple AI player.
+        # Don't use the mouse
+        actions[:, self.CH_MOUSE] = False
+
+        # Move crosshair towards the position chosen by the policy
+        target = self.aim_batch(observations)
+        if target is not None:
+            crosshair = observations['crosshair']
+            actions[:, self.CH_UP] = target[:, 1] < crosshair[:, 1]
+            actions[:, self.CH_DOWN] = target[:, 1] > crosshair[:, 1]
+            actions[:, self.CH_LEFT] = target[:, 0] < crosshair[:, 0]
+            actions[:, self.CH_RIGHT] = target[:, 0] > crosshair[:, 0]
+
+        self.old_actions = actions
+        return actions
 
-    It's necessary to have this layer of abstraction above the get_simple_ai_player_action function, so that two
-    instances of this function can be used in parallel (otherwise both would share the same `old_actions` attribute.
-    :param prob_action: Probability that an action will take the opposite value it had the last time the
-    get_simple_ai_action function was called.
-    :return: An instance of the get_simple_ai_action function.
-    """
-    def get_simple_ai_action(player_index, game_instance):
+    def act(self, player_index, game_instance):
         """
-        Returns the actions for a simple AI player.
-
-        Player movement and deciding when to shoot are done exactly like the get_random_player_action implementation.
-        However, now the crosshair movement always goes in the direction of the player
+        Returns the actions for a single player, as a dictionary.
 
         :param player_index: The index of the player that this AI will play.
         :type player_index: Number
@@ -627,115 +1353,185 @@ def create_simple_ai_action_generator(prob_action=0.05):
             representing whether or not that action will be taken this turn.
         :rtype: Dictionary
         """
-        action_names = ['up', 'down', 'left', 'right', 'shoot']
+        if self.old_actions is None:
+            self.old_actions = np.zeros((1, self.N_ACTIONS), dtype=bool)
+        elif len(self.old_actions) != 1:
+            raise ValueError('Policy was called with 1 player, but it holds state for %d players. Call reset() before '
+                             'using it with another batch.' % len(self.old_actions))
+
+        # Same as act_batch(), but with Python scalars, which are much faster than arrays for a single player
+        actions = self.old_actions[0].tolist()
+        first = self.TOGGLED_ACTIONS.start
+        for j, r in enumerate(self.random(self.TOGGLED_ACTIONS.stop - first).tolist()):
+            if r < self.prob_action:
+                actions[first+j] = not actions[first+j]
 
-        # Initialize old actions
-        if not hasattr(get_simple_ai_action, 'old_actions'):
-            get_simple_ai_action.old_actions = {}
-            for action in action_names:
-                get_simple_ai_action.old_actions[action] = False
+        # Don't use the mouse
+        actions[self.CH_MOUSE] = False
 
-        # For each action
-        actions = {}
-        for action in action_names:
+        # Move crosshair towards the position chosen by the policy
+        player = game_instance.players[player_index]
+        target = self.aim(player, game_instance.players[1-player_index])
+        if target is not None:
+            actions[self.CH_UP] = target[1] < player.crosshair[1]
+            actions[self.CH_DOWN] = target[1] > player.crosshair[1]
+            actions[self.CH_LEFT] = target[0] < player.crosshair[0]
+            actions[self.CH_RIGHT] = target[0] > player.crosshair[0]
 
-            # With probability 'prob_action', do the opposite of what was done in the last call of this function
-            r = np.random.rand()
-            if r < prob_action:
-                actions[action] = not get_simple_ai_action.old_actions[action]
-            else:
-                actions[action] = get_simple_ai_action.old_actions[action]
+        self.old_actions = np.array([actions])
+        return dict(zip(Game.get_names_possible_actions(), actions))
 
-        # Don't use the mouse
-        actions['ch_mouse'] = False
+    __call__ = act
 
-        # Make crosshair follow opponent
-        i = player_index  # shorthand
-        actions['ch_left'] = game_instance.players[1-i].position[0] < game_instance.players[i].crosshair[0]
-        actions['ch_right'] = game_instance.players[1-i].position[0] > game_instance.players[i].crosshair[0]
-        actions['ch_up'] = game_instance.players[1-i].position[1] < game_instance.players[i].crosshair[1]
-        actions['ch_down'] = game_instance.players[1-i].position[1] > game_instance.players[i].crosshair[1]
+    def aim_batch(self, observations):
+        """
+        Returns the positions that the players' crosshairs should move towards, as an array of shape (n, 2), or None if
+        the crosshair movement is toggled randomly.
+        """
+        return None
 
-        # Update the old actions
-        get_simple_ai_action.old_actions = actions.copy()
+    def aim(self, player, opponent):
+        """
+        Same as aim_batch(), for a single player. Returns a position with two elements, or None.
+        """
+        return None
 
-        return actions
 
-    return get_simple_ai_action
+class RandomPlayerPolicy(Policy):
+    """
+    Policy for a random player.
+
+    Every action except 'ch_mouse' is toggled randomly, including the crosshair movement.
+    """
 
+    # The movement, shooting and crosshair movement (contiguous columns)
+    TOGGLED_ACTIONS = slice(Policy.TOGGLED_ACTIONS.start,
+                            max(Policy.CH_UP, Policy.CH_DOWN, Policy.CH_LEFT, Policy.CH_RIGHT) + 1)
 
-def create_not_so_simple_ai_action_generator(prob_action=0.05):
+
+class SimpleAIPolicy(Policy):
     """
-    Creates an action generator for a not so simple AI player.
+    Policy for a simple AI player.
 
-    It's necessary to have this layer of abstraction above the get_not_so_simple_ai_player_action function, so that two
-    instances of this function can be used in parallel (otherwise both would share the same `old_actions` attribute.
-    :param prob_action: Probability that an action will take the opposite value it had the last time the
-    get_not_so_simple_ai_action function was called.
-    :return: An instance of the get_simple_ai_action function.
+    Player movement and deciding when to shoot are done exactly like the RandomPlayerPolicy. However, now the crosshair
+    movement always goes in the direction of the opponent.
     """
-    def get_not_so_simple_ai_action(player_index, game_instance):
-        """
-         Returns the actions for a simple AI player.
-
-         Player movement and deciding when to shoot are done exactly like the get_random_player_action implementation.
-         However, now the crosshair is positioned so as to intercept the oponent's movement, assuming constant velocity.
-
-         :param player_index: The index of the player that this AI will play.
-         :type player_index: Number
-         :param game_instance: The Game instance that the player belongs to.
-         :type game_instance: Game
-         :return: Dictionary of actions that this player will take this turn. Keys are the actions, values are booleans
-             representing whether or not that action will be taken this turn.
-         :rtype: Dictionary
-         """
-        action_names = ['up', 'down', 'left', 'right', 'shoot']
-
-        # Initialize old actions
-        if not hasattr(get_not_so_simple_ai_action, 'old_actions'):
-            get_not_so_simple_ai_action.old_actions = {}
-            for action in action_names:
-                get_not_so_simple_ai_action.old_actions[action] = False
-
-        # For each action
-        actions = {}
-        for action in action_names:
-
-            # With probability 'prob_action', do the opposite of what was done in the last call of this function
-            r = np.random.rand()
-            if r < prob_action:
-                actions[action] = not get_not_so_simple_ai_action.old_actions[action]
-            else:
-                actions[action] = get_not_so_simple_ai_action.old_actions[action]
 
-        # Don't use the mouse
-        actions['ch_mouse'] = False
+    def aim_batch(self, observations):
+
+        # Make crosshair follow opponent
+        return observations['opponent_position']
+
+    def aim(self, player, opponent):
+        return opponent.position
+
+
+class NotSoSimpleAIPolicy(Policy):
+    """
+    Policy for a not so simple AI player.
+
+    Player movement and deciding when to shoot are done exactly like the RandomPlayerPolicy. However, now the crosshair
+    is positioned so as to intercept the opponent's movement, assuming constant velocity.
+
+    Attributes:
+        - shooting_speed: Speed of the bullets, used to predict the position of impact. Number, or None to use the
+            player's physics constants.
+    """
+
+    def __init__(self, prob_action=0.05, seed=None, block_size=4096, shooting_speed=None):
+        """
+        :param shooting_speed: Speed of the bullets, used to predict the position of impact. Default value is None (the
+            shooting speed in the player's physics constants, i.e. its game's PhysicsConfig).
+        :type shooting_speed: Number.
+
+        See Policy for the remaining parameters.
+        """
+        self.shooting_speed = shooting_speed
+        Policy.__init__(self, prob_action, seed, block_size)
+
+    def aim_batch(self, observations):
 
         # Predict position of impact
-        i = player_index  # shorthand
-        x1 = [game_instance.players[i].position[0], game_instance.players[i].position[1]]
-        x2 = [game_instance.players[1-i].position[0], game_instance.players[1-i].position[1]]
-        v2 = [game_instance.players[1-i].velocity[0], game_instance.players[1-i].velocity[1]]
+        x1 = observations['position']
+        x2 = observations['opponent_position']
+        v2 = observations['opponent_velocity']
 
-        alphasq = 3000**2
+        if self.shooting_speed is None:
+            alphasq = observations['shooting_speed']**2
+        else:
+            alphasq = self.shooting_speed**2
 
-        gamma = 4*(dot(v2, x2)-dot(v2, x1))**2-4*(abs2(v2)-alphasq) * \
-                                                    (abs2(x1)+abs2(x2)-2*dot(x1, x2))
-        delta_t = (2*(dot(v2, x1)-dot(v2, x2)) - gamma**0.5) / (2*(abs2(v2)-alphasq))
-        position_to_aim = [x2[0]+v2[0]*delta_t, x2[1]+v2[1]*delta_t]
+        v2_x1 = v2[:, 0]*x1[:, 0] + v2[:, 1]*x1[:, 1]
+        v2_x2 = v2[:, 0]*x2[:, 0] + v2[:, 1]*x2[:, 1]
+        abs2_v2 = v2[:, 0]*v2[:, 0] + v2[:, 1]*v2[:, 1]
+        abs2_x1 = x1[:, 0]*x1[:, 0] + x1[:, 1]*x1[:, 1]
+        abs2_x2 = x2[:, 0]*x2[:, 0] + x2[:, 1]*x2[:, 1]
+        x1_x2 = x1[:, 0]*x2[:, 0] + x1[:, 1]*x2[:, 1]
 
-        # Move crosshair towards predicted position of impact
-        actions['ch_left'] = position_to_aim[0] < game_instance.players[i].crosshair[0]
-        actions['ch_right'] = position_to_aim[0] > game_instance.players[i].crosshair[0]
-        actions['ch_up'] = position_to_aim[1] < game_instance.players[i].crosshair[1]
-        actions['ch_down'] = position_to_aim[1] > game_instance.players[i].crosshair[1]
+        gamma = 4*(v2_x2-v2_x1)**2-4*(abs2_v2-alphasq) * (abs2_x1+abs2_x2-2*x1_x2)
+        delta_t = (2*(v2_x1-v2_x2) - np.sqrt(np.maximum(gamma, 0))) / (2*(abs2_v2-alphasq))
+        return x2 + v2*delta_t[:, None]
 
-        # Update the old actions
-        get_not_so_simple_ai_action.old_actions = actions.copy()
+    def aim(self, player, opponent):
 
-        return actions
+        # Predict position of impact
+        x1 = player.position
+        x2 = opponent.position
+        v2 = opponent.velocity
+
+        if self.shooting_speed is None:
+            alphasq = player.config.shooting_speed**2
+        else:
+            alphasq = self.shooting_speed**2
+
+        # Same as using dot() and abs2(), but without the function calls, since this runs every tick
+        v2_x1 = v2[0]*x1[0] + v2[1]*x1[1]
+        v2_x2 = v2[0]*x2[0] + v2[1]*x2[1]
+        abs2_v2 = v2[0]*v2[0] + v2[1]*v2[1]
 
-    return get_not_so_simple_ai_action
+        gamma = 4*(v2_x2-v2_x1)**2-4*(abs2_v2-alphasq) * \
+            ((x1[0]*x1[0] + x1[1]*x1[1]) + (x2[0]*x2[0] + x2[1]*x2[1]) - 2*(x1[0]*x2[0] + x1[1]*x2[1]))
+        delta_t = (2*(v2_x1-v2_x2) - max(gamma, 0)**0.5) / (2*(abs2_v2-alphasq))
+        return [x2[0]+v2[0]*delta_t, x2[1]+v2[1]*delta_t]
+
+
+def create_random_player_action_generator(prob_action=0.05, seed=None):
+    """
+    Creates an action generator for a random player.
+
+    Each action generator holds its own state, so that several of them can be used in parallel.
+    :param prob_action: Probability that an action will take the opposite value it had the last time the
+    action generator was called.
+    :param seed: Seed for the action generator's random number generator. Default value is None.
+    :return: A RandomPlayerPolicy, which can be called as get_random_player_action(player_index, game_instance).
+    """
+    return RandomPlayerPolicy(prob_action, seed)
+
+
+def create_simple_ai_action_generator(prob_action=0.05, seed=None):
+    """
+    Creates an action generator for a simple AI player.
+
+    Each action generator holds its own state, so that several of them can be used in parallel.
+    :param prob_action: Probability that an action will take the opposite value it had the last time the
+    action generator was called.
+    :param seed: Seed for the action generator's random number generator. Default value is None.
+    :return: A SimpleAIPolicy, which can be called as get_simple_ai_action(player_index, game_instance).
+    """
+    return SimpleAIPolicy(prob_action, seed)
+
+
+def create_not_so_simple_ai_action_generator(prob_action=0.05, seed=None):
+    """
+    Creates an action generator for a not so simple AI player.
+
+    Each action generator holds its own state, so that several of them can be used in parallel.
+    :param prob_action: Probability that an action will take the opposite value it had the last time the
+    action generator was called.
+    :param seed: Seed for the action generator's random number generator. Default value is None.
+    :return: A NotSoSimpleAIPolicy, which can be called as get_not_so_simple_ai_action(player_index, game_instance).
+    """
+    return NotSoSimpleAIPolicy(prob_action, seed)
 
 
 def dot(a, b):
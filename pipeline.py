@@ -0,0 +1,313 @@
+"""
+Runners that drive an interactive move n' shoot game, measuring frame times and input latency.
+
+run_serial() runs the game like the loop in example.py: events, policies, physics and drawing, one after the other, on
+a single thread. PipelinedRunner moves the simulation (policies and physics) to a worker thread that publishes
+immutable GameSnapshot objects into a triple buffer, while the main thread samples input (pygame requires this) and
+draws each newly published snapshot. Neither thread ever waits for the other: input samples are passed to the
+simulation through a second triple buffer, so drawing overlaps with the next tick instead of delaying it.
+"""
+from collections import namedtuple
+import numpy as np
+import pygame
+import threading
+import time
+
+# Immutable copy of the input state: when it was sampled, the key presses and the mouse position
+InputSample = namedtuple('InputSample', ['time', 'key_pressed', 'mouse_pos'])
+
+
+class TripleBuffer:
+    """
+    Lock-light triple buffer for passing the latest value from one producer thread to one consumer thread.
+
+    The producer always writes into its own back slot and the consumer always reads from its own front slot, so they
+    never wait for each other. Only swapping slots with the shared middle slot is done under a lock.
+    """
+
+    def __init__(self):
+        self._slots = [None, None, None]
+        self._back = 0
+        self._middle = 1
+        self._front = 2
+        self._fresh = False
+        self._lock = threading.Lock()
+
+    def publish(self, item):
+        """
+        Publishes a new value, making it the latest one available to the consumer.
+
+        :param item: The value being published.
+        """
+        self._slots[self._back] = item
+        with self._lock:
+            self._back, self._middle = self._middle, self._back
+            self._fresh = True
+
+    def latest(self):
+        """
+        Returns the most recently published value, or None if nothing was published yet.
+        """
+        with self._lock:
+            if self._fresh:
+                self._front, self._middle = self._middle, self._front
+                self._fresh = False
+        return self._slots[self._front]
+
+
+class FrameStats:
+    """
+    Collects the time between presented frames and the input latency of each presented frame.
+
+    Input latency is the time between sampling the input used in the newest simulated tick, and presenting a frame that
+    shows that tick. It doesn't count how long a key press waits to be sampled, so the input sampling intervals are
+    recorded as well, together with the press-to-present latency: a key pressed after the input of the previously
+    presented tick was sampled, and up to when the input of this frame's tick was sampled, is first shown in this
+    frame. Its press-to-present latency is the time from the middle of that interval (the mean over presses at uniformly
+    distributed times) until the frame is presented.
+
+    Attributes:
+        - frame_times: Time between consecutive presented frames, in seconds. List of numbers.
+        - input_latencies: Input latency of each presented frame, in seconds. List of numbers.
+        - press_latencies: Mean press-to-present latency of each presented frame, in seconds. List of numbers.
+        - sampling_intervals: Time between consecutive input samples, in seconds. List of numbers.
+        - ticks: Number of simulation ticks executed. Number.
+    """
+
+    def __init__(self):
+        self.frame_times = []
+        self.input_latencies = []
+        self.press_latencies = []
+        self.sampling_intervals = []
+        self.ticks = 0
+        self._last_present = None
+        self._last_sample = None
+        self._last_presented_input = None
+
+    def record_input_sample(self, sample_time):
+        """
+        Records that the input was sampled at `sample_time`.
+        """
+        if self._last_sample is not None:
+            self.sampling_intervals.append(sample_time - self._last_sample)
+        self._last_sample = sample_time
+
+    def record_frame(self, present_time, input_time):
+        """
+        Records a frame presented at `present_time`, showing a tick whose input was sampled at `input_time`.
+        """
+        if self._last_present is not None:
+            self.frame_times.append(present_time - self._last_present)
+        self._last_present = present_time
+        if input_time is not None:
+            self.input_latencies.append(present_time - input_time)
+            if self._last_presented_input is not None and input_time > self._last_presented_input:
+                self.press_latencies.append(present_time - (self._last_presented_input + input_time) / 2)
+            self._last_presented_input = input_time
+
+    def summary(self):
+        """
+        Returns a dictionary with the mean, median, 95th percentile and maximum of the frame times, input latencies,
+        press-to-present latencies and input sampling intervals, in milliseconds, together with the number of frames and
+        ticks.
+        """
+        result = {'frames': len(self.frame_times) + (self._last_present is not None), 'ticks': self.ticks}
+        for name, values in self.__series():
+            if values:
+                arr = np.array(values) * 1000
+                result[name] = {'mean': arr.mean(), 'p50': np.percentile(arr, 50), 'p95': np.percentile(arr, 95),
+                                'max': arr.max()}
+            else:
+                result[name] = None
+        return result
+
+    def __series(self):
+        return (('frame_time', self.frame_times), ('input_latency', self.input_latencies),
+                ('press_latency', self.press_latencies), ('sampling_interval', self.sampling_intervals))
+
+    def __str__(self):
+        summary = self.summary()
+        lines = ['frames: %d, ticks: %d' % (summary['frames'], summary['ticks'])]
+        for name, _ in self.__series():
+            s = summary[name]
+            if s is None:
+                lines.append('%s: n/a' % name)
+            else:
+                lines.append('%s (ms): mean %.2f, p50 %.2f, p95 %.2f, max %.2f' %
+                             (name, s['mean'], s['p50'], s['p95'], s['max']))
+        return '\n'.join(lines)
+
+
+def run_serial(game_instance, policies, stop_condition, max_frames=None):
+    """
+    Runs the game on a single thread, the same way as the loop in example.py, collecting frame statistics.
+
+    :param game_instance: The game to be run. Must have been created with video_mode=True.
+    :type game_instance: Game
+    :param policies: One action generator per player, called as policy(player_index, game_instance).
+    :type policies: List of functions.
+    :param stop_condition: Called as stop_condition(game_instance) after every tick. The game stops when it returns
+        True.
+    :type stop_condition: Function.
+    :param max_frames: Maximum number of frames to run. Default value is None (no limit).
+    :type max_frames: Number.
+    :return: Statistics of the run.
+    :rtype: FrameStats
+    """
+    stats = FrameStats()
+    while max_frames is None or stats.ticks < max_frames:
+
+        game_instance.handle_events()
+        input_time = time.perf_counter()
+        stats.record_input_sample(input_time)
+
+        actions = [policy(i, game_instance) for i, policy in enumerate(policies)]
+        game_instance.update_physics(actions)
+        stats.ticks += 1
+
+        game_instance.draw_frame()
+        stats.record_frame(time.perf_counter(), input_time)
+
+        if stop_condition(game_instance):
+            break
+
+    return stats
+
+
+class PipelinedRunner:
+    """
+    Runs the game with the simulation on a worker thread and input sampling and drawing on the calling thread.
+
+    The calling thread handles events every `poll_interval` seconds into its own copy of the key presses, and publishes
+    each sample as an InputSample. The worker thread executes policies and physics at a fixed tick rate: at the start
+    of each tick it takes the latest InputSample, without waiting for a new one, and copies it into the game's
+    `key_pressed` and `mouse_pos`, which policies read. The input therefore doesn't change during a tick, and the time
+    of the sample is the one reported with the tick. After every tick it publishes a GameSnapshot. The calling thread
+    draws each new snapshot and flips the display as soon as it is published, limited to `fps` frames per second, while
+    the worker is already running the next tick.
+    """
+
+    def __init__(self, game_instance, policies, tick_rate=60, fps=60, poll_interval=0.001):
+        """
+        :param game_instance: The game to be run. Must have been created with video_mode=True.
+        :type game_instance: Game
+        :param policies: One action generator per player, called as policy(player_index, game_instance) on the
+            simulation thread.
+        :type policies: List of functions.
+        :param tick_rate: Number of simulation ticks per second. Default value is 60, which is the pace of the single
+            threaded loop.
+        :type tick_rate: Number.
+        :param fps: Maximum number of frames drawn per second. Default value is 60.
+        :type fps: Number.
+        :param poll_interval: Time between input samples while there's nothing new to draw, in seconds. Default value
+            is 0.001.
+        :type poll_interval: Number.
+        """
+        self.game = game_instance
+        self.policies = policies
+        self.tick_rate = tick_rate
+        self.fps = fps
+        self.poll_interval = poll_interval
+
+        self._buffer = TripleBuffer()
+        self._inputs = TripleBuffer()
+        self._key_pressed = None
+        self._stop = threading.Event()
+        self._stats = None
+        self._error = None
+
+    def _simulate(self, stop_condition):
+        game = self.game
+        tick_period = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+
+                # Inputs are sampled by the main thread, use the latest sample for the whole tick
+                sample = self._inputs.latest()
+                game.key_pressed = sample.key_pressed
+                game.mouse_pos = sample.mouse_pos
+
+                actions = [policy(i, game) for i, policy in enumerate(self.policies)]
+                game.update_physics(actions)
+                self._stats.ticks += 1
+                self._buffer.publish(game.get_snapshot(sample.time))
+
+                if stop_condition(game):
+                    break
+
+                # Keep a fixed tick rate. If the simulation fell behind, don't try to catch up
+                next_tick += tick_period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        except BaseException as e:
+            # Raised again by run(), on the calling thread
+            self._error = e
+        finally:
+            self._stop.set()
+
+    def run(self, stop_condition, max_frames=None):
+        """
+        Runs the game until `stop_condition` returns True or `max_frames` frames were presented.
+
+        :param stop_condition: Called as stop_condition(game_instance) on the simulation thread after every tick. The
+            game stops when it returns True.
+        :type stop_condition: Function.
+        :param max_frames: Maximum number of frames to present. Default value is None (no limit).
+        :type max_frames: Number.
+        :return: Statistics of the run.
+        :rtype: FrameStats
+        :raises: Any exception raised by a policy, update_physics() or `stop_condition` on the simulation thread.
+        """
+        self._stats = stats = FrameStats()
+        self._stop.clear()
+        self._error = None
+        self._buffer.publish(self.game.get_snapshot())
+
+        # From now on, only the simulation thread writes the game's key presses
+        self._key_pressed = dict(self.game.key_pressed)
+        self.__sample_input()
+
+        worker = threading.Thread(target=self._simulate, args=(stop_condition,), daemon=True)
+        worker.start()
+
+        frame_period = 1 / self.fps
+        next_frame = time.perf_counter()
+        presented = None
+        n_frames = 0
+        try:
+            while not self._stop.is_set() and (max_frames is None or n_frames < max_frames):
+
+                # Keep sampling input until there's a new snapshot, and it's time for the next frame
+                self.__sample_input()
+                snapshot = self._buffer.latest()
+                now = time.perf_counter()
+                if snapshot is presented or now < next_frame:
+                    time.sleep(self.poll_interval)
+                    continue
+
+                self.game.draw_snapshot(snapshot)
+                pygame.display.flip()
+                stats.record_frame(time.perf_counter(), snapshot.input_time)
+                presented = snapshot
+                n_frames += 1
+
+                next_frame = now + frame_period
+        finally:
+            self._stop.set()
+            worker.join()
+
+        if self._error is not None:
+            raise self._error
+
+        return stats
+
+    def __sample_input(self):
+        mouse_pos = self.game.handle_events(self._key_pressed)
+        sample = InputSample(time.perf_counter(), dict(self._key_pressed), mouse_pos)
+        self._inputs.publish(sample)
+        self._stats.record_input_sample(sample.time)
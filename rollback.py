@@ -0,0 +1,359 @@
+"""
+Rollback netcode for the move n' shoot game.
+
+Both peers run the same Game deterministically (same seed, same actions). Each peer simulates its own player with the
+local actions straight away, and predicts the remote player's actions by repeating the last ones it received. When the
+remote actions for an already simulated tick arrive and differ from the prediction, the game is rolled back to the
+state saved before that tick, and the ticks since then are simulated again with the corrected actions.
+
+Running this file starts a local harness: two processes, each running a RollbackSession with an AI player, connected
+by a link with simulated latency, jitter and packet loss. It reports the rollback depths and the cost of re-simulation,
+and checks that both peers end up in the same state.
+"""
+import argparse
+import heapq
+import multiprocessing
+import numpy as np
+import time
+import zlib
+from move_n_shoot import Game
+from move_n_shoot import create_not_so_simple_ai_action_generator
+
+ACTION_NAMES = Game.get_names_possible_actions()
+
+
+def encode_actions(actions):
+    """
+    Encodes a dictionary of actions as a small tuple, which can be compared, hashed and sent over the network.
+
+    :param actions: Dictionary of actions, as used by Game.update_physics().
+    :type actions: Dictionary
+    :return: Tuple with a bit mask of the actions taken (in the order of Game.get_names_possible_actions()), and the
+        sampled mouse position (or None).
+    :rtype: Tuple.
+    """
+    mask = 0
+    for j, name in enumerate(ACTION_NAMES):
+        if actions[name]:
+            mask |= 1 << j
+    mouse_pos = actions.get('mouse_pos')
+    return mask, None if mouse_pos is None else tuple(mouse_pos)
+
+
+def decode_actions(encoded):
+    """
+    Decodes actions encoded by encode_actions() back into a dictionary.
+    """
+    mask, mouse_pos = encoded
+    actions = {}
+    for j, name in enumerate(ACTION_NAMES):
+        actions[name] = bool(mask >> j & 1)
+    if mouse_pos is not None:
+        actions['mouse_pos'] = mouse_pos
+    return actions
+
+
+NO_ACTIONS = encode_actions(dict.fromkeys(ACTION_NAMES, False))
+
+
+def state_checksum(game_instance):
+    """
+    Returns a checksum of the game's simulation state, used to check that two peers didn't desynchronize.
+    """
+    return zlib.crc32(repr(game_instance.save_state()).encode())
+
+
+class RollbackSession:
+    """
+    Runs one peer of a two player game with rollback.
+
+    Every call to advance() simulates one tick, with the local player's actions and the remote player's confirmed or
+    predicted actions. Remote actions are given to add_remote_input() as they arrive. If one of them contradicts a
+    prediction, the next call to advance() (or resolve()) first re-simulates every tick since the misprediction.
+
+    The state before each tick that may still be rolled back is kept (see Game.save_state()). The session never runs
+    more than `max_rollback` ticks ahead of the last confirmed remote actions: can_advance() returns False while it
+    would have to, and the caller should wait for the remote actions.
+
+    Attributes:
+        - game: The game being run. Game object.
+        - local_index: Index of the local player in the game. Number.
+        - remote_index: Index of the remote player in the game. Number.
+        - max_rollback: Maximum number of ticks that can be rolled back. Number.
+        - last_remote_tick: All remote actions up to this tick have been received. Number.
+        - rollback_depths: Number of ticks re-simulated in each rollback. List of numbers.
+        - resimulation_times: Time spent in each rollback, including restoring the state, in seconds. List of numbers.
+    """
+
+    def __init__(self, game_instance, local_index, max_rollback=8):
+        """
+        :param game_instance: The game to be run. Must already have its two players, in the same state as the other
+            peer's game.
+        :type game_instance: Game
+        :param local_index: Index of the local player in the game.
+        :type local_index: Number
+        :param max_rollback: Maximum number of ticks that can be rolled back. Default value is 8.
+        :type max_rollback: Number
+        """
+        self.game = game_instance
+        self.local_index = local_index
+        self.remote_index = 1 - local_index
+        self.max_rollback = max_rollback
+        self.last_remote_tick = game_instance.tick - 1
+
+        self.rollback_depths = []
+        self.resimulation_times = []
+
+        # Inputs and saved states, indexed by tick
+        self._local_inputs = {}
+        self._remote_inputs = {}
+        self._predicted_inputs = {}
+        self._saved_states = {}
+        self._rollback_from = None
+
+    def can_advance(self):
+        """
+        Returns whether advance() can be called without running more than `max_rollback` ticks ahead of the last
+        confirmed remote actions.
+        """
+        return self.game.tick - self.last_remote_tick <= self.max_rollback
+
+    def add_remote_input(self, tick, encoded):
+        """
+        Adds the remote player's actions for a tick. Actions that were already received are ignored.
+
+        :param tick: The tick that the actions belong to.
+        :type tick: Number
+        :param encoded: The actions, as returned by encode_actions().
+        :type encoded: Tuple.
+        """
+        if tick <= self.last_remote_tick or tick in self._remote_inputs:
+            return
+        self._remote_inputs[tick] = encoded
+        while self.last_remote_tick + 1 in self._remote_inputs:
+            self.last_remote_tick += 1
+
+        # If this tick was simulated with a wrong prediction, it has to be simulated again
+        if tick < self.game.tick and self._predicted_inputs[tick] != encoded:
+            if self._rollback_from is None or tick < self._rollback_from:
+                self._rollback_from = tick
+
+    def advance(self, encoded):
+        """
+        Simulates the next tick, with the local player's actions given as argument. Rolls back first if needed.
+
+        :param encoded: The local player's actions for this tick, as returned by encode_actions().
+        :type encoded: Tuple.
+        """
+        self._local_inputs[self.game.tick] = encoded
+        self.resolve()
+        self.__simulate_tick()
+
+        # States and inputs up to the last confirmed tick will never be needed again
+        for inputs in (self._saved_states, self._predicted_inputs, self._local_inputs):
+            for tick in [t for t in inputs if t <= self.last_remote_tick]:
+                del inputs[tick]
+        for tick in [t for t in self._remote_inputs if t < self.last_remote_tick]:
+            del self._remote_inputs[tick]
+
+    def resolve(self):
+        """
+        Performs the pending rollback, if any, so that the game reflects all the remote actions received so far.
+        """
+        if self._rollback_from is None:
+            return
+
+        start_time = time.perf_counter()
+        end_tick = self.game.tick
+        self.game.load_state(self._saved_states[self._rollback_from])
+        while self.game.tick < end_tick:
+            self.__simulate_tick()
+
+        self.rollback_depths.append(end_tick - self._rollback_from)
+        self.resimulation_times.append(time.perf_counter() - start_time)
+        self._rollback_from = None
+
+    def __simulate_tick(self):
+        tick = self.game.tick
+        self._saved_states[tick] = self.game.save_state()
+
+        # Use the remote actions if they were received, otherwise repeat the last ones received
+        remote = self._remote_inputs.get(tick)
+        if remote is None:
+            remote = self._remote_inputs.get(self.last_remote_tick, NO_ACTIONS)
+            self._predicted_inputs[tick] = remote
+        else:
+            self._predicted_inputs.pop(tick, None)
+
+        actions = [None, None]
+        actions[self.local_index] = decode_actions(self._local_inputs[tick])
+        actions[self.remote_index] = decode_actions(remote)
+        self.game.update_physics(actions)
+
+
+class SimulatedLink:
+    """
+    Sending end of a network link with simulated latency, jitter and packet loss, over a multiprocessing Connection.
+
+    Sent packets are dropped with probability `loss`, or held back for `latency` plus up to `jitter` seconds. flush()
+    must be called regularly to deliver the packets that are due.
+    """
+
+    def __init__(self, conn, latency, jitter, loss, seed=None):
+        self.conn = conn
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = np.random.default_rng(seed)
+        self.n_sent = 0
+        self.n_dropped = 0
+        self._queue = []
+
+    def send(self, packet):
+        self.n_sent += 1
+        if self.rng.random() < self.loss:
+            self.n_dropped += 1
+            return
+        deliver_time = time.perf_counter() + self.latency + self.jitter * self.rng.random()
+        heapq.heappush(self._queue, (deliver_time, self.n_sent, packet))
+
+    def flush(self):
+        now = time.perf_counter()
+        while self._queue and self._queue[0][0] <= now:
+            self.conn.send(heapq.heappop(self._queue)[2])
+
+    def receive(self):
+        packets = []
+        while self.conn.poll():
+            packets.append(self.conn.recv())
+        return packets
+
+
+def run_peer(player_index, conn, results, n_ticks, latency, jitter, loss, max_rollback, seed, tick_rate=60,
+             timeout=60):
+    """
+    Runs one peer of the harness: an AI player in a RollbackSession, exchanging actions with the other peer through a
+    SimulatedLink. Puts a dictionary of statistics in the `results` queue when done.
+
+    Each packet carries an acknowledgement of the remote actions received so far, and all the local actions that the
+    other peer didn't acknowledge yet, so lost packets are recovered by the following ones.
+    """
+    game = Game(video_mode=False, seed=seed)
+    game.add_player([100, 100])
+    game.add_player([game.screen_width, game.screen_height])
+    game.reset_game()
+
+    session = RollbackSession(game, player_index, max_rollback)
+    policy = create_not_so_simple_ai_action_generator(seed=seed + 1 + player_index)
+    link = SimulatedLink(conn, latency, jitter, loss, seed + 3 + player_index)
+
+    unacked = {}
+    remote_ack = -1
+    n_stalls = 0
+    tick_times = []
+    tick_period = 1 / tick_rate
+    start_time = next_tick = time.perf_counter()
+    linger = tick_rate // 2
+
+    while time.perf_counter() - start_time < timeout:
+
+        # Receive the remote actions
+        for ack, first_tick, inputs in link.receive():
+            remote_ack = max(remote_ack, ack)
+            for k, encoded in enumerate(inputs):
+                session.add_remote_input(first_tick + k, encoded)
+
+        # Simulate a tick, unless too far ahead of the remote actions
+        if game.tick < n_ticks:
+            if session.can_advance():
+                t = time.perf_counter()
+
+                # Correct the game with the remote actions received so far, so the AI decides on the best known state
+                session.resolve()
+                encoded = encode_actions(policy(player_index, game))
+                unacked[game.tick] = encoded
+                session.advance(encoded)
+                tick_times.append(time.perf_counter() - t)
+            else:
+                n_stalls += 1
+
+        # Once everything was exchanged, keep acknowledging for a while, in case the last acks were lost
+        elif session.last_remote_tick >= n_ticks - 1 and remote_ack >= n_ticks - 1:
+            linger -= 1
+            if linger < 0:
+                break
+
+        # Send the actions that the other peer didn't acknowledge yet
+        for tick in [t for t in unacked if t <= remote_ack]:
+            del unacked[tick]
+        first_tick = min(unacked) if unacked else game.tick
+        link.send((session.last_remote_tick, first_tick, [unacked[t] for t in sorted(unacked)]))
+        link.flush()
+
+        next_tick += tick_period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    session.resolve()
+
+    depths = np.array(session.rollback_depths or [0])
+    times = np.array(session.resimulation_times or [0.0])
+    n_resimulated = int(np.sum(session.rollback_depths))
+    results.put({'player_index': player_index,
+                 'ticks': game.tick,
+                 'completed': session.last_remote_tick >= n_ticks - 1,
+                 'stalls': n_stalls,
+                 'packets_sent': link.n_sent,
+                 'packets_dropped': link.n_dropped,
+                 'rollbacks': len(session.rollback_depths),
+                 'depth_mean': depths.mean(),
+                 'depth_max': int(depths.max()),
+                 'depth_histogram': np.bincount(depths, minlength=max_rollback + 1).tolist(),
+                 'resim_tick_us': 1e6 * times.sum() / max(n_resimulated, 1),
+                 'rollback_ms_mean': 1e3 * times.mean(),
+                 'rollback_ms_max': 1e3 * times.max(),
+                 'tick_ms_mean': 1e3 * np.mean(tick_times),
+                 'frame_budget_ms': 1e3 * tick_period,
+                 'checksum': state_checksum(game),
+                 'scores': [p.score for p in game.players]})
+
+
+def run_harness(n_ticks=1200, latency=0.05, jitter=0.01, loss=0.05, max_rollback=8, seed=0):
+    """
+    Runs two peers in separate processes, connected by a link with simulated latency (one way, in seconds), jitter and
+    packet loss, and returns the statistics of each of them.
+    """
+    conn0, conn1 = multiprocessing.Pipe()
+    results = multiprocessing.Queue()
+    peers = [multiprocessing.Process(target=run_peer,
+                                     args=(i, conn, results, n_ticks, latency, jitter, loss, max_rollback, seed))
+             for i, conn in enumerate((conn0, conn1))]
+    for peer in peers:
+        peer.start()
+    stats = sorted((results.get() for _ in peers), key=lambda s: s['player_index'])
+    for peer in peers:
+        peer.join()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run two rollback peers locally, over a simulated network.')
+    parser.add_argument('--ticks', type=int, default=1200)
+    parser.add_argument('--latency', type=float, default=0.05, help='one way latency, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.01, help='maximum extra latency, in seconds')
+    parser.add_argument('--loss', type=float, default=0.05, help='probability of dropping each packet')
+    parser.add_argument('--max-rollback', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stats = run_harness(args.ticks, args.latency, args.jitter, args.loss, args.max_rollback, args.seed)
+    for s in stats:
+        print('Peer %d: %d ticks, %d stalls, %d/%d packets dropped' %
+              (s['player_index'], s['ticks'], s['stalls'], s['packets_dropped'], s['packets_sent']))
+        print('  rollbacks: %d, depth mean %.2f, max %d, histogram %s' %
+              (s['rollbacks'], s['depth_mean'], s['depth_max'], s['depth_histogram']))
+        print('  re-simulation: %.1f us per tick, %.3f ms per rollback (max %.3f ms, frame budget %.1f ms)' %
+              (s['resim_tick_us'], s['rollback_ms_mean'], s['rollback_ms_max'], s['frame_budget_ms']))
+        print('  tick with rollback: %.3f ms mean, scores %s' % (s['tick_ms_mean'], s['scores']))
+    print('States match:', stats[0]['checksum'] == stats[1]['checksum'] and all(s['completed'] for s in stats))
@@ -0,0 +1,531 @@
+"""
+Parameter sweeps over the game's physics constants.
+
+BatchMatch simulates many headless matches between two AI policies at once, with numpy: every match is a lane of the
+same arrays, and every lane has its own PhysicsConfig. run_sweep() plays several matches for each of a list of configs
+(built with grid_configs() or random_configs()) in a single batch, and reports the outcome of each config.
+
+Running this file sweeps a small grid of configs and prints the results and the throughput.
+"""
+import itertools
+import numpy as np
+import time
+from move_n_shoot import Game, PhysicsConfig
+from move_n_shoot import NotSoSimpleAIPolicy, Policy, SimpleAIPolicy
+
+
+class BatchMatch:
+    """
+    Class for simulating many headless matches at once, one per lane, each lane with its own physics constants.
+
+    The physics follow Game.update_physics() without level obstacles. The only difference is that positions aren't
+    rounded to whole pixels when checking collisions, like pygame's Rect objects do. compare_with_game() checks that a
+    lane agrees with Game tick by tick, until the first time rounding makes a difference.
+
+    Arrays have the lane as their first dimension, and player states have the player as their second dimension, e.g.
+    `position[lane, player, axis]`. Once most matches have ended, run() drops their lanes from the arrays, so the
+    remaining matches are simulated at full speed. `lane_ids` tells which match each lane belongs to, and `results`
+    keeps the statistics of every match, indexed by match.
+
+    Attributes:
+        - n_matches: Number of matches. Number.
+        - player_size, bullet_size: Width and height of the players and bullets, taken from Game's own objects. Arrays
+            with shape (2,).
+        - lane_ids: Match of each lane. Array with shape (n_lanes,).
+        - params: Value of each physics constant, for each lane. Dictionary of arrays with shape (n_lanes,).
+        - policies: Policy of each player, deciding that player's actions in every lane. List of two Policy objects.
+        - position, velocity, acceleration, crosshair: State of the players. Arrays with shape (n_lanes, 2, 2).
+        - bullet_position, bullet_velocity: State of the bullets. Arrays with shape (n_lanes, 2, 2).
+        - bullet_shot: Whether each bullet was shot. Boolean array with shape (n_lanes, 2).
+        - score: Score of each player. Array with shape (n_lanes, 2).
+        - shots: Number of bullets shot by each player. Array with shape (n_lanes, 2).
+        - player_collisions: Number of collisions between the players. Array with shape (n_lanes,).
+        - ticks: Number of updates until the match ended. Array with shape (n_lanes,).
+        - done: Whether each match has ended. Boolean array with shape (n_lanes,).
+        - results: Final 'score', 'shots', 'player_collisions' and 'ticks' of each match, filled in when its lane is
+            dropped. Dictionary of arrays with shape (n_matches, ...).
+    """
+
+    # Per lane arrays, and the ones among them that are kept in `results`
+    LANE_ARRAYS = ['position', 'velocity', 'acceleration', 'crosshair', 'bullet_position', 'bullet_velocity',
+                   'bullet_shot', 'score', 'shots', 'player_collisions', 'ticks', 'done', 'lane_ids']
+    RESULTS = ['score', 'shots', 'player_collisions', 'ticks']
+
+    def __init__(self, configs, policies, screen_sz=None, max_score=3, max_ticks=20000, seed=None):
+        """
+        Initializes a batch of matches, with random initial positions, like Game.reset_game().
+
+        :param configs: Physics constants of each lane.
+        :type configs: List of PhysicsConfig.
+        :param policies: Policy of each of the two players. A NotSoSimpleAIPolicy without a fixed shooting speed aims
+            with each lane's.
+        :type policies: List of Policy.
+        :param screen_sz: Width and height of the arena. Default value is (1600,800).
+        :type screen_sz: Tuple with two elements.
+        :param max_score: A match ends when a player reaches this score. Default value is 3.
+        :type max_score: Number.
+        :param max_ticks: A match also ends after this many updates. Default value is 20000.
+        :type max_ticks: Number.
+        :param seed: Seed for the random number generator used for the initial positions and the physics. Default value
+            is None (unpredictable seed).
+        :type seed: Number.
+        """
+        if screen_sz is None:
+            screen_sz = (1600, 800)
+
+        self.n_matches = n = len(configs)
+        self.lane_ids = np.arange(n)
+        self.screen_sz = np.array(screen_sz, dtype=float)
+        self.max_score = max_score
+        self.max_ticks = max_ticks
+        self.rng = np.random.default_rng(seed)
+
+        self.params = {name: np.array([getattr(config, name) for config in configs], dtype=float)
+                       for name in PhysicsConfig.PARAMETERS}
+
+        # Players and bullets have the same size as in a Game
+        game = Game(screen_sz, video_mode=False)
+        game.add_player()
+        self.player_size = np.array(game.players[0].img.get_size(), dtype=float)
+        self.bullet_size = np.array(game.players[0].bullet.img.get_size(), dtype=float)
+
+        self.policies = policies
+
+        self.position = self.rng.integers(0, screen_sz, size=(n, 2, 2)).astype(float)
+        self.velocity = np.zeros((n, 2, 2))
+        self.acceleration = np.zeros((n, 2, 2))
+        self.crosshair = self.rng.integers(0, screen_sz, size=(n, 2, 2)).astype(float)
+
+        self.bullet_position = np.full((n, 2, 2), -100.0)
+        self.bullet_velocity = np.zeros((n, 2, 2))
+        self.bullet_shot = np.zeros((n, 2), dtype=bool)
+
+        self.score = np.zeros((n, 2), dtype=int)
+        self.shots = np.zeros((n, 2), dtype=int)
+        self.player_collisions = np.zeros(n, dtype=int)
+        self.ticks = np.zeros(n, dtype=int)
+        self.done = np.zeros(n, dtype=bool)
+
+        self.results = {name: np.zeros_like(getattr(self, name)) for name in self.RESULTS}
+
+    def get_observations(self, player_index):
+        """
+        Returns the observations of one of the players in every lane, in the format of get_observations().
+        """
+        i = player_index  # shorthand
+        return {'position': self.position[:, i],
+                'velocity': self.velocity[:, i],
+                'crosshair': self.crosshair[:, i],
+                'opponent_position': self.position[:, 1-i],
+                'opponent_velocity': self.velocity[:, 1-i],
+                'shooting_speed': self.params['shooting_speed']}
+
+    def step(self):
+        """
+        Updates every lane once, like Game.update_physics(). Lanes whose match has ended keep being updated, but their
+        scores and statistics don't change anymore.
+        """
+        active = ~self.done
+        delta_t = 1 / (60 * self.params['slowdown_factor'])
+
+        actions = [policy.act_batch(self.get_observations(i)) for i, policy in enumerate(self.policies)]
+
+        for i in range(2):
+            self.__update_player(i, actions[i], delta_t, active)
+
+            # Limit crosshair position
+            np.clip(self.crosshair[:, i], 0, self.screen_sz, out=self.crosshair[:, i])
+
+            # Check collisions with walls
+            position = self.position[:, i]
+            velocity = self.velocity[:, i]
+            restitution = self.params['wall_restitution']
+            half = self.player_size / 2
+            for axis in range(2):
+                low = position[:, axis] - half[axis] < 0
+                high = position[:, axis] + half[axis] > self.screen_sz[axis]
+                position[low, axis] = half[axis]
+                position[high, axis] = self.screen_sz[axis] - half[axis]
+                bounce = low | high
+                velocity[bounce, axis] *= -restitution[bounce]
+
+            # Check bullet collision with walls
+            bullet = self.bullet_position[:, i]
+            half = self.bullet_size / 2
+            outside = ((bullet + half < 0) | (bullet - half > self.screen_sz)).any(axis=1) & self.bullet_shot[:, i]
+            self.__reset_bullets(i, outside)
+
+            # Check bullet collision with the other player
+            reach = (self.player_size + self.bullet_size) / 2
+            hit = (np.abs(self.bullet_position[:, i] - self.position[:, 1-i]) < reach).all(axis=1)
+            self.score[hit & active, i] += 1
+            self.__reset_bullets(i, hit)
+
+        self.__parse_player_collision(active)
+
+        self.ticks[active] += 1
+        self.done |= (self.score >= self.max_score).any(axis=1) | (self.ticks >= self.max_ticks)
+
+    def run(self):
+        """
+        Updates all lanes until every match has ended. Whenever at least half of the lanes have ended, they are dropped.
+        """
+        while len(self.lane_ids) > 0:
+            self.step()
+            if 2 * np.count_nonzero(self.done) >= len(self.done):
+                self.drop_finished_lanes()
+
+    def drop_finished_lanes(self):
+        """
+        Saves the statistics of the lanes whose match has ended in `results`, and removes those lanes from the arrays
+        (and from the policies' state).
+        """
+        done = self.done
+        for name in self.RESULTS:
+            self.results[name][self.lane_ids[done]] = getattr(self, name)[done]
+
+        keep = ~done
+        for name in self.LANE_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+        self.params = {name: values[keep] for name, values in self.params.items()}
+
+        for policy in self.policies:
+            if policy.old_actions is not None:
+                policy.old_actions = policy.old_actions[keep]
+
+    def __update_player(self, i, actions, delta_t, active):
+        """
+        Same as Player.update(), for player `i` in every lane.
+        """
+        p = self.params
+        position = self.position[:, i]
+        velocity = self.velocity[:, i]
+        acceleration = self.acceleration[:, i]
+        dt = delta_t[:, None]
+
+        # Update position and velocity (CA model)
+        position += velocity * dt + acceleration * (dt ** 2) / 2
+        velocity += acceleration * dt
+
+        # Update acceleration
+        actions = actions.astype(float)
+        thrust = np.stack((actions[:, Policy.RIGHT] - actions[:, Policy.LEFT],
+                           actions[:, Policy.DOWN] - actions[:, Policy.UP]), axis=1)
+        thrust_mag = np.sqrt((thrust ** 2).sum(axis=1))
+        acceleration[:] = thrust * (p['thrust'] / np.where(thrust_mag > 0, thrust_mag, 1))[:, None]
+
+        # Limit maximum speed
+        speed = np.sqrt((velocity ** 2).sum(axis=1))
+        too_fast = speed > p['max_speed']
+        velocity[too_fast] *= (p['max_speed'][too_fast] / speed[too_fast])[:, None]
+
+        # Threshold the velocities to zero
+        velocity[speed < p['stop_speed']] = 0
+
+        # Add friction-like component
+        moving = speed > 0.1
+        acceleration[moving] -= velocity[moving] / speed[moving, None] * p['friction'][moving, None]
+
+        # Update crosshair position
+        self.crosshair[:, i, 0] += p['crosshair_speed'] * (actions[:, Policy.CH_RIGHT] - actions[:, Policy.CH_LEFT])
+        self.crosshair[:, i, 1] += p['crosshair_speed'] * (actions[:, Policy.CH_DOWN] - actions[:, Policy.CH_UP])
+
+        # Shoot, if player chose this action (and isn't aiming exactly at itself)
+        aim = self.crosshair[:, i] - position
+        aim_distance = np.sqrt((aim ** 2).sum(axis=1))
+        shoot = (actions[:, Policy.SHOOT] > 0) & ~self.bullet_shot[:, i] & (aim_distance > 0)
+        self.bullet_velocity[shoot, i] = aim[shoot] * (p['shooting_speed'][shoot] / aim_distance[shoot])[:, None]
+        self.bullet_position[shoot, i] = position[shoot]
+        self.bullet_shot[shoot, i] = True
+        self.shots[shoot & active, i] += 1
+
+        # Update bullet
+        self.bullet_position[:, i] += np.where(self.bullet_shot[:, i, None], self.bullet_velocity[:, i] * dt, 0)
+
+    def __reset_bullets(self, i, lanes):
+        self.bullet_position[lanes, i] = -100
+        self.bullet_velocity[lanes, i] = 0
+        self.bullet_shot[lanes, i] = False
+
+    def __parse_player_collision(self, active):
+        """
+        Same as the collision between players in Game.update_physics(), for every lane.
+        """
+        l = self.player_size
+        distance = np.abs(self.position[:, 0] - self.position[:, 1])
+        colliding = (distance < l).all(axis=1)
+        if not colliding.any():
+            return
+        self.player_collisions[colliding & active] += 1
+
+        lanes = np.nonzero(colliding)[0]
+        overlap = l - distance[lanes]
+        relative_speed = np.abs(self.velocity[lanes, 0] - self.velocity[lanes, 1])
+
+        # If both players had zero velocity, resolve by randomly separating them
+        stopped = (relative_speed == 0).all(axis=1)
+        relative_speed[stopped] = self.rng.random((stopped.sum(), 2))
+
+        # The collision likely happened in the direction with the smallest time since the collision
+        with np.errstate(divide='ignore'):
+            time_since = np.where(relative_speed > 0, overlap / relative_speed, np.inf)
+        is_collision = time_since <= time_since[:, ::-1]
+
+        # Change players' positions to where they were right before impact
+        delta_t = time_since.min(axis=1)[:, None, None]
+        self.position[lanes] -= self.velocity[lanes] * delta_t
+
+        # Switch players' velocities in the direction of the collision
+        velocity = self.velocity[lanes]
+        self.velocity[lanes] = np.where(is_collision[:, None, :], velocity[:, ::-1], velocity)
+
+
+def grid_configs(base=None, **values):
+    """
+    Returns every combination of the given values of the physics constants.
+
+    For example, grid_configs(thrust=[10000, 20000], wall_restitution=[0.5, 0.8, 1]) returns 6 configs.
+
+    :param base: Configuration providing the constants that aren't swept. Default value is PhysicsConfig().
+    :type base: PhysicsConfig.
+    :param values: List of values of each swept constant, by name.
+    :return: The configurations of the grid.
+    :rtype: List of PhysicsConfig.
+    """
+    if base is None:
+        base = PhysicsConfig()
+    names = list(values)
+    return [base.replace(**dict(zip(names, combination))) for combination in itertools.product(*values.values())]
+
+
+def random_configs(n, ranges, base=None, seed=None):
+    """
+    Returns `n` configurations, with each swept constant drawn uniformly from its range.
+
+    :param n: Number of configurations.
+    :type n: Number.
+    :param ranges: Lowest and highest value of each swept constant, by name.
+    :type ranges: Dictionary of tuples with two elements.
+    :param base: Configuration providing the constants that aren't swept. Default value is PhysicsConfig().
+    :type base: PhysicsConfig.
+    :param seed: Seed for the random number generator. Default value is None (unpredictable seed).
+    :type seed: Number.
+    :return: The random configurations.
+    :rtype: List of PhysicsConfig.
+    """
+    if base is None:
+        base = PhysicsConfig()
+    rng = np.random.default_rng(seed)
+    samples = {name: rng.uniform(low, high, n).tolist() for name, (low, high) in ranges.items()}
+    return [base.replace(**{name: samples[name][j] for name in samples}) for j in range(n)]
+
+
+def run_sweep(configs, policy_classes=None, matches_per_config=16, max_score=3, max_ticks=20000, screen_sz=None,
+              prob_action=0.05, seed=0):
+    """
+    Plays `matches_per_config` matches for each configuration, all in a single BatchMatch, and reports the outcome of
+    each configuration.
+
+    The outcome of a configuration is a dictionary with:
+        - 'config': The configuration. PhysicsConfig.
+        - 'match_length': Mean number of updates per match. Number.
+        - 'timeouts': Fraction of matches that reached `max_ticks`. Number.
+        - 'hit_rate': Fraction of the bullets shot, by both players, that hit the opponent. Number.
+        - 'score_balance': (score of player 1 - score of player 2) / total score, over all matches. 0 means both AIs are
+            equally good. Number.
+        - 'player_collisions': Mean number of collisions between players per match. Number.
+
+    :param configs: The configurations being evaluated.
+    :type configs: List of PhysicsConfig.
+    :param policy_classes: Policy class of each of the two players. Default value is NotSoSimpleAIPolicy against
+        SimpleAIPolicy.
+    :type policy_classes: List of classes.
+    :param matches_per_config: Number of matches played with each configuration. Default value is 16.
+    :type matches_per_config: Number.
+    :param seed: Seed for the initial positions, physics and policies. Default value is 0.
+    :type seed: Number.
+
+    See BatchMatch for the remaining parameters.
+
+    :return: The outcome of each configuration, in the same order as `configs`.
+    :rtype: List of dictionaries.
+    """
+    if policy_classes is None:
+        policy_classes = [NotSoSimpleAIPolicy, SimpleAIPolicy]
+
+    lane_configs = [config for config in configs for _ in range(matches_per_config)]
+    policies = [policy_class(prob_action, seed=seed + 1 + i) for i, policy_class in enumerate(policy_classes)]
+    batch = BatchMatch(lane_configs, policies, screen_sz, max_score, max_ticks, seed)
+    batch.run()
+
+    # Group the lanes of each configuration together
+    shape = (len(configs), matches_per_config)
+    ticks = batch.results['ticks'].reshape(shape)
+    score = batch.results['score'].reshape(shape + (2,)).sum(axis=1)
+    shots = batch.results['shots'].reshape(shape + (2,)).sum(axis=1)
+    collisions = batch.results['player_collisions'].reshape(shape)
+
+    results = []
+    for j, config in enumerate(configs):
+        total_score = score[j].sum()
+        results.append({'config': config,
+                        'match_length': ticks[j].mean(),
+                        'timeouts': (ticks[j] >= max_ticks).mean(),
+                        'hit_rate': total_score / max(shots[j].sum(), 1),
+                        'score_balance': (score[j, 0] - score[j, 1]) / max(total_score, 1),
+                        'player_collisions': collisions[j].mean()})
+    return results
+
+def compare_with_game(config=None, policy_classes=None, n_ticks=3000, screen_sz=None, prob_action=0.05, seed=0,
+                      tolerance=1e-6):
+    """
+    Plays the same match in a Game and in a single lane of a BatchMatch, one tick at a time, and returns how long both
+    states agree.
+
+    Both start from the Game's initial state, and each one has its own policies, with the same seeds, so they take the
+    same actions for as long as the states agree. They are expected to agree until an object ends up within a pixel of
+    a collision, where Game rounds positions to whole pixels and BatchMatch doesn't ('rounding'), or until the players
+    collide while standing still, which each one resolves with its own random numbers ('random'). Any other difference
+    ('physics') means that BatchMatch doesn't follow Game.update_physics() anymore.
+
+    :param config: Physics constants of the match. Default value is PhysicsConfig().
+    :type config: PhysicsConfig.
+    :param policy_classes: Policy class of each of the two players. Default value is NotSoSimpleAIPolicy against
+        SimpleAIPolicy.
+    :type policy_classes: List of classes.
+    :param n_ticks: Maximum number of ticks compared. Default value is 3000.
+    :type n_ticks: Number.
+    :param tolerance: Largest difference between two numbers that are considered equal. Default value is 1e-6.
+    :type tolerance: Number.
+
+    See run_sweep() for the remaining parameters.
+
+    :return: Dictionary with:
+        - 'ticks': Number of ticks for which both states agreed. Number.
+        - 'difference': What made the states differ first, 'rounding', 'random' or 'physics', or None if they agreed for
+            `n_ticks` ticks. String.
+    :rtype: Dictionary
+    """
+    if config is None:
+        config = PhysicsConfig()
+    if policy_classes is None:
+        policy_classes = [NotSoSimpleAIPolicy, SimpleAIPolicy]
+
+    game = Game(screen_sz, video_mode=False, seed=seed, config=config)
+    game.add_player([100, 100])
+    game.add_player([game.screen_width, game.screen_height])
+    game.reset_game()
+    game_policies = [policy_class(prob_action, seed=seed + 1 + i) for i, policy_class in enumerate(policy_classes)]
+
+    batch_policies = [policy_class(prob_action, seed=seed + 1 + i) for i, policy_class in enumerate(policy_classes)]
+    batch = BatchMatch([config], batch_policies, (game.screen_width, game.screen_height), max_score=np.inf,
+                       max_ticks=n_ticks, seed=seed)
+    batch.position[0] = [p.position for p in game.players]
+    batch.crosshair[0] = [p.crosshair for p in game.players]
+
+    for tick in range(n_ticks):
+        state = game.save_state()
+        actions = [policy(i, game) for i, policy in enumerate(game_policies)]
+        game.update_physics(actions)
+        batch.step()
+
+        game_values = [[p.position for p in game.players], [p.velocity for p in game.players],
+                       [p.crosshair for p in game.players], [p.bullet.position for p in game.players],
+                       [p.score for p in game.players]]
+        batch_values = [batch.position[0], batch.velocity[0], batch.crosshair[0], batch.bullet_position[0],
+                        batch.score[0]]
+        if not all(np.allclose(a, b, rtol=0, atol=tolerance) for a, b in zip(game_values, batch_values)):
+            return {'ticks': tick, 'difference': _explain_difference(game, state, actions)}
+
+    return {'ticks': n_ticks, 'difference': None}
+
+
+def _explain_difference(game, state, actions):
+    """
+    Tells whether the states of a Game and a BatchMatch lane can differ after the update from `state` with `actions`,
+    because of rounding or random numbers. See compare_with_game().
+    """
+
+    # Repeat the update of both players, without any collisions
+    scratch = Game((game.screen_width, game.screen_height), video_mode=False, config=game.config)
+    scratch.add_player()
+    scratch.add_player()
+    scratch.load_state(state)
+    before = np.array([p.position for p in scratch.players], dtype=float)
+    for player, player_actions in zip(scratch.players, actions):
+        player.update(player_actions, 1 / (60 * game.config.slowdown_factor))
+
+    position = np.array([p.position for p in scratch.players], dtype=float)
+    bullet = np.array([p.bullet.position for p in scratch.players], dtype=float)
+    shot = [p.bullet.was_shot for p in scratch.players]
+    screen = np.array([game.screen_width, game.screen_height], dtype=float)
+    size = np.array(game.players[0].img.get_size(), dtype=float)
+    bullet_size = np.array(game.players[0].bullet.img.get_size(), dtype=float)
+
+    def near(a, b):
+        return (np.abs(a - b) < 1).any()
+
+    def touching(distance, reach):
+        return (distance < reach + 1).all() and near(distance, reach)
+
+    # Players and bullets next to the borders of the screen
+    if near(position - size / 2, 0) or near(position + size / 2, screen):
+        return 'rounding'
+    for i in range(2):
+        if shot[i] and (near(bullet[i] + bullet_size / 2, 0) or near(bullet[i] - bullet_size / 2, screen)):
+            return 'rounding'
+
+    # Bullets next to the opponent, before or after it moved, and players next to each other
+    for i in range(2):
+        for opponent in (before[1-i], position[1-i]):
+            if touching(np.abs(bullet[i] - opponent), (size + bullet_size) / 2):
+                return 'rounding'
+    distance = np.abs(position[0] - position[1])
+    if touching(distance, size):
+        return 'rounding'
+    if (distance < size).all() and not any(np.any(p.velocity) for p in scratch.players):
+        return 'random'
+
+    return 'physics'
+
+
+if __name__ == '__main__':
+
+    # Constants
+    matches_per_config = 16
+    configs = grid_configs(thrust=[10000, 20000, 30000],
+                           shooting_speed=[2000, 3000, 4000],
+                           wall_restitution=[0.5, 0.8, 1.0])
+
+    # BatchMatch re-implements Game.update_physics(), so check that it only differs from Game by rounding
+    agreement = [compare_with_game(config, seed=seed) for config in configs[::4] for seed in range(3)]
+    assert all(a['difference'] != 'physics' for a in agreement), 'BatchMatch differs from Game: %s' % agreement
+    print('BatchMatch agrees with Game until rounding differs: %.0f ticks on average, over %d matches' %
+          (np.mean([a['ticks'] for a in agreement]), len(agreement)))
+
+    start = time.perf_counter()
+    results = run_sweep(configs, matches_per_config=matches_per_config)
+    elapsed = time.perf_counter() - start
+
+    print('%8s %8s %6s %10s %9s %9s %11s' % ('thrust', 'shoot', 'rest', 'length', 'timeouts', 'hit rate', 'balance'))
+    for r in results:
+        c = r['config']
+        print('%8.0f %8.0f %6.2f %10.1f %9.2f %9.3f %11.3f' % (c.thrust, c.shooting_speed, c.wall_restitution,
+                                                              r['match_length'], r['timeouts'], r['hit_rate'],
+                                                              r['score_balance']))
+
+    total_ticks = sum(r['match_length'] for r in results) * matches_per_config
+    print('%d matches, %d ticks in %.2f s: %.0f ticks/s' %
+          (len(configs) * matches_per_config, total_ticks, elapsed, total_ticks / elapsed))
+
+    # Compare with a single match played through Game, one tick at a time
+    myGame = Game(video_mode=False, seed=0)
+    myGame.add_player([100, 100])
+    myGame.add_player([myGame.screen_width, myGame.screen_height])
+    myGame.reset_game()
+    policies = [NotSoSimpleAIPolicy(seed=1), SimpleAIPolicy(seed=2)]
+    n_ticks = 3000
+    start = time.perf_counter()
+    for _ in range(n_ticks):
+        myGame.update_physics([policies[0](0, myGame), policies[1](1, myGame)])
+    print('Game, one match at a time: %.0f ticks/s' % (n_ticks / (time.perf_counter() - start)))